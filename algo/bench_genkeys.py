@@ -0,0 +1,68 @@
+#==========================================================
+# bench_genkeys.py
+#==========================================================
+# Breaks down the cost of key generation at large key
+# sizes: finding the primes, choosing e, and computing d
+# and the CRT parameters with modinv
+#
+# Run from the algo directory:
+#
+#   python bench_genkeys.py
+#   python bench_genkeys.py --sizes 1024 2048 --reps 5
+
+import argparse
+import time
+
+from keygen_common import randomPrime, choosePublicExponent, modinv
+
+from random import seed
+seed( 0xdeadbeef )
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser( description = "Benchmark key generation" )
+    parser.add_argument( "--sizes", type = int, nargs = "+",
+                         default = [ 512, 1024, 2048, 4096 ],
+                         help = "modulus sizes (in bits) to benchmark" )
+    parser.add_argument( "--reps", type = int, default = 3,
+                         help = "key pairs generated per size" )
+    opts = parser.parse_args()
+
+    print( "{:>6} {:>12} {:>12} {:>12} {:>12}".format(
+        "bits", "primes (ms)", "e (ms)", "modinv (ms)", "total (ms)" ) )
+
+    for bits in opts.sizes:
+
+        prime_time  = 0.0
+        e_time      = 0.0
+        modinv_time = 0.0
+
+        for i in range( opts.reps ):
+
+            start = time.perf_counter()
+            p = randomPrime( bits // 2 )
+            q = randomPrime( bits - ( bits // 2 ) )
+            prime_time += time.perf_counter() - start
+
+            totient = ( p - 1 ) * ( q - 1 )
+
+            start = time.perf_counter()
+            e = choosePublicExponent( totient )
+            e_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            d    = modinv( e, totient )
+            qInv = modinv( q, p )
+            modinv_time += time.perf_counter() - start
+
+            assert ( e * d ) % totient == 1
+            assert ( q * qInv ) % p == 1
+
+        total = prime_time + e_time + modinv_time
+
+        print( "{:>6} {:>12.3f} {:>12.3f} {:>12.3f} {:>12.3f}".format(
+            bits,
+            prime_time  / opts.reps * 1e3,
+            e_time      / opts.reps * 1e3,
+            modinv_time / opts.reps * 1e3,
+            total       / opts.reps * 1e3 ) )
@@ -0,0 +1,119 @@
+#==========================================================
+# bench_ladder.py
+#==========================================================
+# Measures how the run time of each Montgomery
+# exponentiation mode varies with the Hamming weight of
+# the exponent, and what the side-channel-hardened ladder
+# costs compared with the fast paths
+#
+# Run from the algo directory:
+#
+#   python bench_ladder.py
+#   python bench_ladder.py --bits 2048 --reps 10
+
+import argparse
+import statistics
+import time
+
+import montgomery.rsa_crypt as mont
+
+from random import getrandbits, randint, sample, seed
+seed( 0xdeadbeef )
+
+modes = [
+    ( "binary", mont.mod_exp        ),
+    ( "window", mont.mod_exp_window ),
+    ( "ladder", mont.mod_exp_ladder ),
+]
+
+#------------------------------------------
+# gen_exponent
+#------------------------------------------
+# A random exponent of exactly the given size, with the
+# given fraction of its bits set (including the top bit)
+
+def gen_exponent( bits, weight ):
+    num_set   = max( 1, round( bits * weight ) )
+    positions = [ bits - 1 ] + sample( range( bits - 1 ), num_set - 1 )
+    return sum( 1 << position for position in positions )
+
+#------------------------------------------
+# time_once
+#------------------------------------------
+# Returns the run time (in seconds) of one exponentiation
+# of a random base
+
+def time_once( func, exponent, modulus ):
+
+    base = randint( 0, modulus - 1 )
+
+    start   = time.perf_counter()
+    result  = func( base, exponent, modulus )
+    elapsed = time.perf_counter() - start
+
+    assert result == pow( base, exponent, modulus )
+    return elapsed
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser( description = "Benchmark timing variance of the Montgomery ladder" )
+    parser.add_argument( "--bits", type = int, default = 1024,
+                         help = "modulus and exponent size (in bits)" )
+    parser.add_argument( "--weights", type = float, nargs = "+",
+                         default = [ 0.1, 0.25, 0.5, 0.75, 0.9 ],
+                         help = "fractions of exponent bits set" )
+    parser.add_argument( "--reps", type = int, default = 20,
+                         help = "timed runs per mode and weight" )
+    opts = parser.parse_args()
+
+    modulus   = getrandbits( opts.bits ) | ( 1 << ( opts.bits - 1 ) ) | 1
+    exponents = [ gen_exponent( opts.bits, weight ) for weight in opts.weights ]
+
+    # Build the contexts up front, so that setup isn't timed
+
+    for name, func in modes:
+        func( 2, 3, modulus )
+
+    # Interleave the modes and weights within each repetition, so that
+    # drift in the machine's speed is spread across all of them
+
+    samples = dict( ( ( name, weight ), [] ) for name, func in modes
+                                             for weight in opts.weights )
+
+    for i in range( opts.reps ):
+        for name, func in modes:
+            for weight, exponent in zip( opts.weights, exponents ):
+                samples[ ( name, weight ) ].append( time_once( func, exponent, modulus ) )
+
+    print( "{}-bit modulus, {} runs per point".format( opts.bits, opts.reps ) )
+    print( "" )
+    print( "{:>8} {:>8} {:>12} {:>12} {:>10}".format(
+        "mode", "weight", "median (ms)", "stdev (ms)", "ops/sec" ) )
+
+    summary = []
+
+    for name, func in modes:
+
+        medians = []
+        for weight in opts.weights:
+            median = statistics.median( samples[ ( name, weight ) ] )
+            stdev  = statistics.pstdev( samples[ ( name, weight ) ] )
+            medians.append( median )
+
+            print( "{:>8} {:>8.2f} {:>12.3f} {:>12.3f} {:>10.1f}".format(
+                name, weight, median * 1e3, stdev * 1e3, 1 / median ) )
+
+        summary.append( ( name, statistics.mean( medians ), max( medians ) - min( medians ) ) )
+
+    # The spread is how much the median run time moves across Hamming
+    # weights; a side-channel-hardened mode should keep it near zero
+
+    window_mean = dict( ( name, mean ) for name, mean, spread in summary )[ "window" ]
+
+    print( "" )
+    print( "{:>8} {:>12} {:>12} {:>10} {:>12}".format(
+        "mode", "mean (ms)", "spread (ms)", "spread", "vs window" ) )
+
+    for name, mean, spread in summary:
+        print( "{:>8} {:>12.3f} {:>12.3f} {:>9.1f}% {:>11.2f}x".format(
+            name, mean * 1e3, spread * 1e3, 100 * spread / mean, mean / window_mean ) )
@@ -0,0 +1,83 @@
+#==========================================================
+# bench_montgomery.py
+#==========================================================
+# Benchmarks the multi-precision Montgomery engine against
+# the naive implementation and Python's built-in pow(), at
+# realistic RSA key sizes
+#
+# Run from the algo directory:
+#
+#   python bench_montgomery.py
+#   python bench_montgomery.py --sizes 1024 2048 --word-bits 64
+
+import argparse
+import time
+
+from naive.rsa_crypt      import mod_exp as mod_exp_naive
+from montgomery.rsa_crypt import mod_exp as mod_exp_mont
+
+from random import getrandbits, randint, seed
+seed( 0xdeadbeef )
+
+#------------------------------------------
+# gen_operands
+#------------------------------------------
+# Generates a random odd modulus of exactly the given
+# size, along with a base and full-width exponent
+
+def gen_operands( bits ):
+    modulus  = getrandbits( bits ) | ( 1 << ( bits - 1 ) ) | 1
+    base     = randint( 0, modulus - 1 )
+    exponent = getrandbits( bits ) | ( 1 << ( bits - 1 ) )
+    return base, exponent, modulus
+
+#------------------------------------------
+# time_call
+#------------------------------------------
+# Returns the average time (in seconds) of calling
+# func( *args ) over a number of repetitions
+
+def time_call( func, args, reps ):
+    start = time.perf_counter()
+    for i in range( reps ):
+        func( *args )
+    return ( time.perf_counter() - start ) / reps
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser( description = "Benchmark the Montgomery engine" )
+    parser.add_argument( "--sizes", type = int, nargs = "+",
+                         default = [ 1024, 2048, 4096 ],
+                         help = "modulus sizes (in bits) to benchmark" )
+    parser.add_argument( "--word-bits", type = int, default = 32,
+                         help = "limb size of the Montgomery engine" )
+    parser.add_argument( "--reps", type = int, default = 3,
+                         help = "repetitions per measurement" )
+    opts = parser.parse_args()
+
+    print( "Montgomery word size: {} bits".format( opts.word_bits ) )
+    print( "" )
+    print( "{:>6} {:>8} {:>12} {:>12} {:>12} {:>10}".format(
+        "bits", "exp", "pow (ms)", "naive (ms)", "mont (ms)", "mont/pow" ) )
+
+    for bits in opts.sizes:
+
+        base, exponent, modulus = gen_operands( bits )
+
+        # Encryption-style (e = 65537) and decryption-style
+        # (full-width d) exponents
+
+        for exp_name, exp in [ ( "65537", 65537 ), ( "full", exponent ) ]:
+
+            expected = pow( base, exp, modulus )
+            assert mod_exp_naive( base, exp, modulus )                 == expected
+            assert mod_exp_mont ( base, exp, modulus, opts.word_bits ) == expected
+
+            t_pow   = time_call( pow,           ( base, exp, modulus ), opts.reps )
+            t_naive = time_call( mod_exp_naive, ( base, exp, modulus ), opts.reps )
+            t_mont  = time_call( mod_exp_mont,
+                                 ( base, exp, modulus, opts.word_bits ), opts.reps )
+
+            print( "{:>6} {:>8} {:>12.3f} {:>12.3f} {:>12.3f} {:>9.1f}x".format(
+                bits, exp_name, t_pow * 1e3, t_naive * 1e3, t_mont * 1e3,
+                t_mont / t_pow ) )
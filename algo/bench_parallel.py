@@ -0,0 +1,74 @@
+#==========================================================
+# bench_parallel.py
+#==========================================================
+# Measures how batch exponentiation throughput scales
+# with the number of worker processes, for the naive and
+# Montgomery engines
+#
+# Run from the algo directory:
+#
+#   python bench_parallel.py
+#   python bench_parallel.py --bits 1024 --ops 512 --max-workers 8
+
+import argparse
+import os
+import time
+
+from parallel import ParallelExecutor
+
+from random import getrandbits, randint, seed
+seed( 0xdeadbeef )
+
+engines = [ "naive", "montgomery" ]
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser( description = "Benchmark parallel exponentiation" )
+    parser.add_argument( "--bits", type = int, default = 512,
+                         help = "modulus size (in bits)" )
+    parser.add_argument( "--ops", type = int, default = 256,
+                         help = "exponentiations per measurement" )
+    parser.add_argument( "--shard-size", type = int, default = 16,
+                         help = "values sent to a worker per task" )
+    parser.add_argument( "--max-workers", type = int, default = os.cpu_count(),
+                         help = "largest number of worker processes to try" )
+    opts = parser.parse_args()
+
+    # Decryption-style workload: full-width exponent under one modulus
+
+    modulus  = getrandbits( opts.bits ) | ( 1 << ( opts.bits - 1 ) ) | 1
+    exponent = getrandbits( opts.bits ) | ( 1 << ( opts.bits - 1 ) )
+    values   = [ randint( 0, modulus - 1 ) for i in range( opts.ops ) ]
+    expected = [ pow( value, exponent, modulus ) for value in values ]
+
+    print( "{} exponentiations, {}-bit modulus, full-width exponent".format(
+        opts.ops, opts.bits ) )
+    print( "" )
+    print( "{:>10} {:>8} {:>10} {:>10} {:>8}".format(
+        "engine", "workers", "time (s)", "ops/sec", "speedup" ) )
+
+    for engine in engines:
+
+        base_time = None
+
+        for workers in range( 1, opts.max_workers + 1 ):
+
+            with ParallelExecutor( [ ( exponent, modulus ) ], engine,
+                                   max_workers = workers,
+                                   shard_size  = opts.shard_size ) as pool:
+
+                # Warm up the pool, so that process start-up and key
+                # shipping aren't counted
+                list( pool.map( 0, values[:workers] ) )
+
+                start   = time.perf_counter()
+                results = list( pool.map( 0, values ) )
+                elapsed = time.perf_counter() - start
+
+            assert results == expected, "Parallel results disagree with pow()!"
+
+            if( base_time is None ):
+                base_time = elapsed
+
+            print( "{:>10} {:>8} {:>10.3f} {:>10.1f} {:>7.2f}x".format(
+                engine, workers, elapsed, opts.ops / elapsed, base_time / elapsed ) )
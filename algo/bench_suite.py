@@ -0,0 +1,248 @@
+#==========================================================
+# bench_suite.py
+#==========================================================
+# Times encryption and decryption for each of our
+# implementations (and the reference) across key sizes,
+# exponent sizes and batch sizes, giving a software
+# baseline to compare the accelerator against
+#
+# Results are printed as a table, and can also be written
+# as JSON and/or CSV. Run from the algo directory:
+#
+#   python bench_suite.py
+#   python bench_suite.py --key-bits 32 1024 --batch-sizes 1 64 \
+#                         --json results.json --csv results.csv
+
+import argparse
+import csv
+import json
+import platform
+import time
+
+import rsa.core                      as ref
+import naive.rsa_crypt               as naive
+import montgomery.rsa_crypt          as mont
+import montgomery_hardware.rsa_crypt as hard
+
+from random import getrandbits, randint, seed
+
+#------------------------------------------
+# Engines
+#------------------------------------------
+# Each engine maps an op to a function that takes a batch
+# of values, an exponent and a modulus and returns a list
+# of results. The reference has no batch API, so we loop
+#
+# The hardware model only supports 32-bit moduli, and the
+# reference doesn't count multiplies (stats is None)
+
+def ref_encrypt_many( messages, e, n ):
+    return [ ref.encrypt_int( message, e, n ) for message in messages ]
+
+def ref_decrypt_many( ciphertexts, d, n ):
+    return [ ref.decrypt_int( ciphertext, d, n ) for ciphertext in ciphertexts ]
+
+def batch_op( func ):
+    return lambda values, exponent, modulus: list( func( values, exponent, modulus ) )
+
+engines = {
+    "ref": {
+        "encrypt":  ref_encrypt_many,
+        "decrypt":  ref_decrypt_many,
+        "stats":    None,
+        "max_bits": None,
+    },
+    "naive": {
+        "encrypt":  batch_op( naive.encrypt_many ),
+        "decrypt":  batch_op( naive.decrypt_many ),
+        "stats":    naive.mul_stats,
+        "max_bits": None,
+    },
+    "montgomery": {
+        "encrypt":  batch_op( mont.encrypt_many ),
+        "decrypt":  batch_op( mont.decrypt_many ),
+        "stats":    mont.mul_stats,
+        "max_bits": None,
+    },
+    "hardware": {
+        "encrypt":  batch_op( hard.encrypt_many ),
+        "decrypt":  batch_op( hard.decrypt_many ),
+        "stats":    hard.mul_stats,
+        "max_bits": 32,
+    },
+}
+
+# Columns of the report, in order
+
+fields = [ "engine", "op", "key_bits", "exp_bits", "batch_size", "batches",
+           "ops", "ops_per_sec", "p50_us", "p99_us", "mean_us",
+           "squarings_per_op", "multiplies_per_op" ]
+
+#------------------------------------------
+# gen_modulus / gen_exponent
+#------------------------------------------
+# Random odd modulus of exactly the given size, and an
+# exponent of the given size (65537 for 17 bits, as the
+# usual public exponent)
+
+def gen_modulus( bits ):
+    return getrandbits( bits ) | ( 1 << ( bits - 1 ) ) | 1
+
+def gen_exponent( bits ):
+    if( bits == 17 ):
+        return 65537
+    return getrandbits( bits ) | ( 1 << ( bits - 1 ) ) | 1
+
+#------------------------------------------
+# percentile
+#------------------------------------------
+# Nearest-rank percentile of a list of samples
+
+def percentile( samples, pct ):
+    ordered = sorted( samples )
+    rank    = max( 1, -( -len( ordered ) * pct // 100 ) )
+    return ordered[ int( rank ) - 1 ]
+
+#------------------------------------------
+# run_config
+#------------------------------------------
+# Times one engine/op/size combination, returning a row
+# of the report. Each batch uses fresh random values, and
+# every result is checked against pow()
+
+def run_config( name, op, modulus, exponent, batch_size, batches ):
+
+    engine = engines[ name ]
+    func   = engine[ op ]
+    stats  = engine[ "stats" ]
+
+    # Warm up (e.g. so that Montgomery contexts are built and cached)
+    func( [ randint( 0, modulus - 1 ) ], exponent, modulus )
+
+    if( stats is not None ):
+        stats.reset()
+
+    samples = []
+    total   = 0.0
+
+    for i in range( batches ):
+        values = [ randint( 0, modulus - 1 ) for j in range( batch_size ) ]
+
+        start   = time.perf_counter()
+        results = func( values, exponent, modulus )
+        elapsed = time.perf_counter() - start
+
+        for value, result in zip( values, results ):
+            assert result == pow( value, exponent, modulus ), \
+                "{} {} gave the wrong result!".format( name, op )
+
+        total += elapsed
+        samples.append( elapsed / batch_size )
+
+    ops = batch_size * batches
+
+    return {
+        "engine":            name,
+        "op":                op,
+        "key_bits":          modulus.bit_length(),
+        "exp_bits":          exponent.bit_length(),
+        "batch_size":        batch_size,
+        "batches":           batches,
+        "ops":               ops,
+        "ops_per_sec":       ops / total,
+        "p50_us":            percentile( samples, 50 ) * 1e6,
+        "p99_us":            percentile( samples, 99 ) * 1e6,
+        "mean_us":           total / ops * 1e6,
+        "squarings_per_op":  stats.squarings  / ops if stats is not None else None,
+        "multiplies_per_op": stats.multiplies / ops if stats is not None else None,
+    }
+
+#------------------------------------------
+# print_row
+#------------------------------------------
+
+def print_header():
+    print( "{:>10} {:>7} {:>5} {:>5} {:>5} {:>12} {:>10} {:>10} {:>8} {:>8}".format(
+        "engine", "op", "key", "exp", "batch", "ops/sec", "p50(us)",
+        "p99(us)", "sqr/op", "mul/op" ) )
+
+def print_row( row ):
+
+    def count( value ):
+        return "-" if value is None else "{:.1f}".format( value )
+
+    print( "{:>10} {:>7} {:>5} {:>5} {:>5} {:>12.1f} {:>10.1f} {:>10.1f} {:>8} {:>8}".format(
+        row[ "engine" ], row[ "op" ], row[ "key_bits" ], row[ "exp_bits" ],
+        row[ "batch_size" ], row[ "ops_per_sec" ], row[ "p50_us" ],
+        row[ "p99_us" ], count( row[ "squarings_per_op" ] ),
+        count( row[ "multiplies_per_op" ] ) ) )
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser( description = "Benchmark all RSA implementations" )
+    parser.add_argument( "--engines", nargs = "+", choices = list( engines ),
+                         default = list( engines ),
+                         help = "implementations to benchmark" )
+    parser.add_argument( "--ops", nargs = "+", choices = [ "encrypt", "decrypt" ],
+                         default = [ "encrypt", "decrypt" ],
+                         help = "operations to benchmark" )
+    parser.add_argument( "--key-bits", type = int, nargs = "+",
+                         default = [ 32, 512, 1024 ],
+                         help = "modulus sizes (in bits)" )
+    parser.add_argument( "--exp-bits", nargs = "+", default = [ "17", "full" ],
+                         help = "exponent sizes (in bits); 'full' matches the "
+                                "modulus, and 17 uses e = 65537" )
+    parser.add_argument( "--batch-sizes", type = int, nargs = "+",
+                         default = [ 1, 16 ],
+                         help = "values exponentiated per call" )
+    parser.add_argument( "--batches", type = int, default = 20,
+                         help = "timed batches per configuration" )
+    parser.add_argument( "--seed", type = int, default = 0xdeadbeef,
+                         help = "random seed for keys and messages" )
+    parser.add_argument( "--json", help = "write the report as JSON to this file" )
+    parser.add_argument( "--csv",  help = "write the report as CSV to this file" )
+    opts = parser.parse_args()
+
+    seed( opts.seed )
+
+    rows = []
+    print_header()
+
+    for key_bits in opts.key_bits:
+
+        modulus = gen_modulus( key_bits )
+
+        for exp_bits in opts.exp_bits:
+
+            exponent = gen_exponent( key_bits if exp_bits == "full" else int( exp_bits ) )
+
+            for batch_size in opts.batch_sizes:
+                for op in opts.ops:
+                    for name in opts.engines:
+
+                        max_bits = engines[ name ][ "max_bits" ]
+                        if( max_bits is not None and key_bits > max_bits ):
+                            continue
+
+                        row = run_config( name, op, modulus, exponent,
+                                          batch_size, opts.batches )
+                        rows.append( row )
+                        print_row( row )
+
+    # Write the machine-readable reports
+
+    if( opts.json is not None ):
+        report = {
+            "python":  platform.python_version(),
+            "machine": platform.machine(),
+            "seed":    opts.seed,
+            "results": rows,
+        }
+        with open( opts.json, "w" ) as f:
+            json.dump( report, f, indent = 2 )
+
+    if( opts.csv is not None ):
+        with open( opts.csv, "w", newline = "" ) as f:
+            writer = csv.DictWriter( f, fieldnames = fields )
+            writer.writeheader()
+            writer.writerows( rows )
@@ -0,0 +1,71 @@
+#==========================================================
+# bench_window.py
+#==========================================================
+# Compares the multiply counts and run times of binary
+# (square-and-multiply) and sliding window exponentiation
+# for each of our implementations
+#
+# Run from the algo directory:
+#
+#   python bench_window.py
+
+import time
+
+import naive.rsa_crypt               as naive
+import montgomery.rsa_crypt          as mont
+import montgomery_hardware.rsa_crypt as hard
+
+from random import getrandbits, randint, seed
+seed( 0xdeadbeef )
+
+engines = [
+    ( "naive",      naive ),
+    ( "montgomery", mont  ),
+    ( "hardware",   hard  ),
+]
+
+exponent_sizes = [ 17, 32, 64, 256, 1024, 2048 ]
+
+#------------------------------------------
+# measure
+#------------------------------------------
+# Runs one exponentiation, returning the result, the
+# engine's multiply counts and the time taken
+
+def measure( engine, func, base, exponent, modulus ):
+    engine.mul_stats.reset()
+    start  = time.perf_counter()
+    result = func( base, exponent, modulus )
+    elapsed = time.perf_counter() - start
+    return result, engine.mul_stats.total(), elapsed
+
+if __name__ == "__main__":
+
+    # The hardware model only supports 32-bit moduli, so we use one for
+    # all engines; the multiply counts only depend on the exponent
+
+    modulus = getrandbits( 32 ) | ( 1 << 31 ) | 1
+    base    = randint( 0, modulus - 1 )
+
+    exponents = [ getrandbits( bits ) | ( 1 << ( bits - 1 ) )
+                  for bits in exponent_sizes ]
+
+    print( "{:>10} {:>6} {:>6} {:>8} {:>8} {:>8} {:>11} {:>11}".format(
+        "engine", "bits", "window", "binary", "sliding", "saved",
+        "binary(ms)", "sliding(ms)" ) )
+
+    for name, engine in engines:
+        for bits, exponent in zip( exponent_sizes, exponents ):
+
+            ref, binary_muls, binary_time = measure(
+                engine, engine.mod_exp, base, exponent, modulus )
+            res, window_muls, window_time = measure(
+                engine, engine.mod_exp_window, base, exponent, modulus )
+
+            assert ref == res, "Binary and sliding window results disagree!"
+
+            print( "{:>10} {:>6} {:>6} {:>8} {:>8} {:>7.1f}% {:>11.3f} {:>11.3f}".format(
+                name, bits, engine.window_size_for( bits ),
+                binary_muls, window_muls,
+                100.0 * ( binary_muls - window_muls ) / binary_muls,
+                binary_time * 1e3, window_time * 1e3 ) )
@@ -0,0 +1,87 @@
+#==========================================================
+# exp_common.py
+#==========================================================
+# Exponentiation helpers shared by the naive, montgomery
+# and montgomery_hardware rsa_crypt modules
+#
+# The demos run from inside a package directory, so they
+# add algo/ to the import path to find this module
+
+#------------------------------------------
+# MulStats
+#------------------------------------------
+# Counts the modular squarings and multiplications
+# performed by mod_exp and mod_exp_window, so that the
+# cost of the two methods can be compared. Each
+# rsa_crypt module keeps its own mul_stats
+
+class MulStats:
+
+    def __init__( self ):
+        self.reset()
+
+    def reset( self ):
+        self.squarings  = 0
+        self.multiplies = 0
+
+    def total( self ):
+        return self.squarings + self.multiplies
+
+    def __str__( self ):
+        return "{} squarings, {} multiplies ({} total)".format(
+            self.squarings, self.multiplies, self.total() )
+
+
+#------------------------------------------
+# window_size_for
+#------------------------------------------
+# Picks a sliding window size from the length of the
+# exponent, trading the size of the odd-power table
+# against the number of multiplies saved
+
+def window_size_for( exponent_bits ):
+
+    if  ( exponent_bits > 671 ): return 6
+    elif( exponent_bits > 239 ): return 5
+    elif( exponent_bits >  79 ): return 4
+    elif( exponent_bits >  23 ): return 3
+    else:                        return 1
+
+#------------------------------------------
+# recode_exponent
+#------------------------------------------
+# Splits an exponent into sliding windows, scanning
+# from the most significant bit. Returns a list of
+# ( num_squarings, value ) pairs - for each window, the
+# result is squared num_squarings times, then multiplied
+# by base ** value (where value is always odd) - along
+# with the number of squarings for any trailing zeros
+
+def recode_exponent( exponent, window_size ):
+
+    windows   = []
+    squarings = 0
+
+    i = exponent.bit_length() - 1
+
+    while( i >= 0 ):
+
+        if( ( ( exponent >> i ) & 1 ) == 0 ):
+            squarings += 1
+            i -= 1
+            continue
+
+        # Take the longest window of at most window_size bits that
+        # ends in a 1
+
+        low = max( i - window_size + 1, 0 )
+        while( ( ( exponent >> low ) & 1 ) == 0 ):
+            low += 1
+
+        value = ( exponent >> low ) & ( ( 1 << ( i - low + 1 ) ) - 1 )
+
+        windows.append( ( squarings + ( i - low + 1 ), value ) )
+        squarings = 0
+        i = low - 1
+
+    return windows, squarings
@@ -0,0 +1,305 @@
+#==========================================================
+# fuzz.py
+#==========================================================
+# Differential fuzzing of our implementations against the
+# reference, sharded across processes
+#
+# Each case is one random message under one key: it is
+# encrypted, decrypted and CRT-decrypted by every engine,
+# and all results must match the reference. Keys come from
+# the on-disk KeyStore (generated in parallel on a miss),
+# and each engine processes a whole batch of messages per
+# key through its batch API. On a mismatch, the failing
+# inputs are shrunk to a minimal case. Run from the algo
+# directory:
+#
+#   python fuzz.py --cases 10000000 --batch 1000
+#   python fuzz.py --bits 64 --engines naive montgomery
+
+import argparse
+import importlib
+import itertools
+import os
+import random
+import time
+
+from collections        import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from rsa.core import encrypt_int, decrypt_int
+
+from keystore import KeyStore, gen_key
+
+ENGINES = [ "naive", "montgomery", "montgomery_hardware" ]
+
+#------------------------------------------
+# Worker state
+#------------------------------------------
+# Set up once per worker process by init_worker
+
+worker_store   = None
+worker_engines = None
+
+def init_worker( bits, seed, path, engine_names ):
+    '''
+    Opens the key store and imports each engine's rsa_crypt module
+    '''
+
+    global worker_store, worker_engines
+
+    worker_store   = KeyStore( bits, seed, path )
+    worker_engines = [ ( name, importlib.import_module( name + ".rsa_crypt" ) )
+                       for name in engine_names ]
+
+#------------------------------------------
+# gen_messages
+#------------------------------------------
+# The messages for a key, reproducible from the seed and
+# key index
+
+def gen_messages( seed, index, n, batch ):
+    rng = random.Random( "{}:{}:messages".format( seed, index ) )
+    return [ rng.randint( 0, n - 1 ) for i in range( batch ) ]
+
+#------------------------------------------
+# check_key
+#------------------------------------------
+# Runs one batch of cases under a key, returning a list of
+# failures as ( engine, op, input, expected, actual )
+
+def check_key( key, messages, engines ):
+
+    n, e, d, p, q, dP, dQ, qInv = key
+
+    ciphertexts = [ encrypt_int( message, e, n ) for message in messages ]
+
+    for ciphertext, message in zip( ciphertexts, messages ):
+        assert decrypt_int( ciphertext, d, n ) == message, \
+            "Reference failed to round-trip - bad key?"
+
+    failures = []
+
+    for name, engine in engines:
+
+        results = [
+            ( "encrypt", messages,    ciphertexts,
+              list( engine.encrypt_many( messages, e, n ) ) ),
+            ( "decrypt", ciphertexts, messages,
+              list( engine.decrypt_many( ciphertexts, d, n ) ) ),
+            ( "decrypt_crt", ciphertexts, messages,
+              [ engine.decrypt_crt( c, p, q, dP, dQ, qInv ) for c in ciphertexts ] ),
+        ]
+
+        for op, inputs, expected, actual in results:
+            for value, want, got in zip( inputs, expected, actual ):
+                if( want != got ):
+                    failures.append( ( name, op, value, want, got ) )
+
+    return failures
+
+#------------------------------------------
+# run_shard
+#------------------------------------------
+# Fuzzes a range of key indices, returning the number of
+# cases run and any failures (tagged with their key index)
+
+def run_shard( indices, batch ):
+
+    cases    = 0
+    failures = []
+
+    for index in indices:
+        key      = worker_store.get( index )
+        messages = gen_messages( worker_store.seed, index, key[0], batch )
+
+        for failure in check_key( key, messages, worker_engines ):
+            failures.append( ( index, ) + failure )
+
+        cases += len( messages )
+
+    return cases, failures
+
+#------------------------------------------
+# shrink
+#------------------------------------------
+# Greedily reduces a value while fails( value ) still
+# holds: first towards 0 and 1, then by halving, then by
+# clearing set bits one at a time
+
+def shrink( value, fails ):
+
+    improved = True
+    while( improved ):
+        improved = False
+
+        candidates = [ 0, 1, value >> 1 ]
+        candidates += [ value & ~( 1 << bit ) for bit in range( value.bit_length() )
+                        if ( value >> bit ) & 1 ]
+
+        for candidate in candidates:
+            if( candidate < value and fails( candidate ) ):
+                value    = candidate
+                improved = True
+                break
+
+    return value
+
+#------------------------------------------
+# minimize
+#------------------------------------------
+# Shrinks a failure down to a minimal ( base, exponent,
+# modulus ) for the engine's exponentiation. CRT failures
+# keep their key, so only the ciphertext is shrunk
+
+def minimize( engine_name, op, value, key ):
+
+    engine = importlib.import_module( engine_name + ".rsa_crypt" )
+    n, e, d, p, q, dP, dQ, qInv = key
+
+    if( op == "decrypt_crt" ):
+        def fails( c ):
+            return engine.decrypt_crt( c, p, q, dP, dQ, qInv ) != pow( c, d, n )
+
+        return { "op": op, "ciphertext": shrink( value, fails ), "n": n, "d": d,
+                 "p": p, "q": q, "dP": dP, "dQ": dQ, "qInv": qInv }
+
+    # Encryption and decryption are both a single exponentiation, which
+    # decrypt_many does without range checks
+
+    def exp_fails( base, exponent ):
+        return list( engine.decrypt_many( [ base ], exponent, n ) )[0] != pow( base, exponent, n )
+
+    base     = value
+    exponent = e if op == "encrypt" else d
+
+    while( True ):
+        new_exponent = shrink( exponent, lambda x: exp_fails( base, x ) )
+        new_base     = shrink( base, lambda x: exp_fails( x, new_exponent ) )
+
+        if( ( new_base, new_exponent ) == ( base, exponent ) ):
+            break
+
+        base, exponent = new_base, new_exponent
+
+    return { "op": op, "base": base, "exponent": exponent, "n": n,
+             "expected": pow( base, exponent, n ),
+             "actual": list( engine.decrypt_many( [ base ], exponent, n ) )[0] }
+
+#------------------------------------------
+# gen_keys_parallel
+#------------------------------------------
+# KeyStore generator that spreads key generation across a
+# process pool
+
+def gen_keys_parallel( pool ):
+    def generate( bits, seed, indices ):
+        return list( pool.map( gen_key, itertools.repeat( bits ), itertools.repeat( seed ),
+                               indices, chunksize = 64 ) )
+    return generate
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser( description = "Differentially fuzz the RSA implementations" )
+    parser.add_argument( "--cases", type = int, default = 100000,
+                         help = "total number of messages to test" )
+    parser.add_argument( "--batch", type = int, default = 100,
+                         help = "messages tested per key" )
+    parser.add_argument( "--shard", type = int, default = 8,
+                         help = "keys per task sent to a worker" )
+    parser.add_argument( "--bits", type = int, default = 32,
+                         help = "key size (the hardware model needs 32 or fewer)" )
+    parser.add_argument( "--seed", type = int, default = 0,
+                         help = "seed for keys and messages" )
+    parser.add_argument( "--engines", nargs = "+", choices = ENGINES, default = ENGINES,
+                         help = "implementations to test" )
+    parser.add_argument( "--workers", type = int, default = os.cpu_count() or 1,
+                         help = "worker processes" )
+    parser.add_argument( "--cache", default = None,
+                         help = "key cache directory (default: algo/.keycache)" )
+    parser.add_argument( "--keep-going", action = "store_true",
+                         help = "don't stop at the first failing shard" )
+    opts = parser.parse_args()
+
+    engines = list( opts.engines )
+    if( opts.bits > 32 and "montgomery_hardware" in engines ):
+        print( "Skipping montgomery_hardware, which only supports 32-bit keys" )
+        engines.remove( "montgomery_hardware" )
+
+    store = KeyStore( opts.bits, opts.seed ) if opts.cache is None else \
+            KeyStore( opts.bits, opts.seed, opts.cache )
+
+    num_keys = -( -opts.cases // opts.batch )
+
+    # Make sure the keys exist before any worker maps the file
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor( max_workers = opts.workers ) as pool:
+        cached = len( store )
+        store.ensure( num_keys, gen_keys_parallel( pool ) )
+
+    print( "Keys: {} needed, {} cached, {:.1f} s to generate the rest".format(
+        num_keys, min( cached, num_keys ), time.perf_counter() - start ) )
+
+    # Fuzz, keeping a bounded number of shards in flight
+
+    shards = [ range( i, min( i + opts.shard, num_keys ) )
+               for i in range( 0, num_keys, opts.shard ) ]
+
+    cases    = 0
+    failures = []
+    start    = time.perf_counter()
+    last     = start
+
+    with ProcessPoolExecutor( max_workers = opts.workers, initializer = init_worker,
+                              initargs = ( opts.bits, opts.seed, os.path.dirname( store.filename ),
+                                           engines ) ) as pool:
+
+        pending   = iter( shards )
+        in_flight = deque()
+
+        while( True ):
+            while( len( in_flight ) < 4 * opts.workers and
+                   ( opts.keep_going or not failures ) ):
+                shard = next( pending, None )
+                if( shard is None ):
+                    break
+                in_flight.append( pool.submit( run_shard, shard, opts.batch ) )
+
+            if( len( in_flight ) == 0 ):
+                break
+
+            shard_cases, shard_failures = in_flight.popleft().result()
+            cases    += shard_cases
+            failures += shard_failures
+
+            now = time.perf_counter()
+            if( now - last >= 5.0 ):
+                last = now
+                rate = cases / ( now - start )
+                print( "  {:>12} cases, {:>10.0f} cases/s, ETA {:.0f} s".format(
+                    cases, rate, ( opts.cases - cases ) / rate ) )
+
+    elapsed = time.perf_counter() - start
+    print( "Ran {} cases in {:.1f} s ({:.0f} cases/s, {} workers)".format(
+        cases, elapsed, cases / elapsed, opts.workers ) )
+
+    if( not failures ):
+        print( "All cases passed!" )
+        exit( 0 )
+
+    # Report the first failure, shrunk to a minimal case
+
+    print( "ERROR: {} failing cases".format( len( failures ) ) )
+
+    index, name, op, value, want, got = failures[0]
+    key = store.get( index )
+
+    print( "First failure: {} {} (bits = {}, seed = {}, key index = {})".format(
+        name, op, opts.bits, opts.seed, index ) )
+    print( "  input {}, expected {}, got {}".format( value, want, got ) )
+
+    print( "Minimal case:" )
+    for field, field_value in minimize( name, op, value, key ).items():
+        print( "  {:<10} {}".format( field, field_value ) )
+
+    exit( 1 )
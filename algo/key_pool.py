@@ -0,0 +1,182 @@
+#==========================================================
+# key_pool.py
+#==========================================================
+# A pool of pre-generated RSA key pairs, kept topped up by
+# background worker processes so that get_key() returns
+# immediately on the latency-critical path
+#
+# Run from the algo directory, like test.py:
+#
+#   from key_pool import KeyPool
+#
+#   with KeyPool( bits = 1024, size = 16 ) as pool:
+#       keys = pool.get_key()
+#       print( pool.stats() )
+
+import importlib
+import multiprocessing
+import queue
+import random
+import time
+
+# Upper edges (in seconds) of the generation-time histogram
+# buckets; the final bucket holds everything slower
+
+HISTOGRAM_EDGES = [ 0.001, 0.01, 0.1, 0.5, 1.0, 5.0 ]
+
+#------------------------------------------
+# keygen_worker
+#------------------------------------------
+# Body of each background process: generates key pairs
+# and puts them on the shared queue, blocking while the
+# pool is full
+
+def keygen_worker( engine_name, bits, keys, generated, histogram, stop ):
+
+    rsa_genkeys = importlib.import_module( engine_name + ".rsa_genkeys" )
+
+    # Re-seed, so that forked workers don't draw the same keys
+    random.seed()
+
+    while( not stop.is_set() ):
+
+        start = time.perf_counter()
+        key   = rsa_genkeys.gen_keys( bits )
+        gen_time = time.perf_counter() - start
+
+        # Record the generation time
+
+        bucket = len( HISTOGRAM_EDGES )
+        for i, edge in enumerate( HISTOGRAM_EDGES ):
+            if( gen_time <= edge ):
+                bucket = i
+                break
+
+        with histogram.get_lock():
+            histogram[ bucket ] += 1
+
+        # Wait for space in the pool, checking periodically whether we
+        # should stop
+
+        while( not stop.is_set() ):
+            try:
+                keys.put( key, timeout = 0.1 )
+            except queue.Full:
+                continue
+
+            with generated.get_lock():
+                generated.value += 1
+            break
+
+#------------------------------------------
+# KeyPool
+#------------------------------------------
+# Keeps a bounded queue of ready key pairs, refilled in
+# the background
+
+class KeyPool:
+
+    def __init__( self, bits = 32, size = 8, num_workers = 1, engine = "naive" ):
+        '''
+        Starts num_workers processes generating keys with a modulus of the
+        given size, using the given algo package's gen_keys, until size
+        key pairs are waiting in the pool
+        '''
+
+        assert size > 0 and num_workers > 0
+
+        self.bits = bits
+        self.size = size
+
+        self.keys      = multiprocessing.Queue( maxsize = size )
+        self.generated = multiprocessing.Value( "L", 0 )
+        self.histogram = multiprocessing.Array( "L", len( HISTOGRAM_EDGES ) + 1 )
+        self.stop      = multiprocessing.Event()
+
+        self.taken      = 0
+        self.start_time = time.perf_counter()
+
+        self.workers = [
+            multiprocessing.Process(
+                target = keygen_worker,
+                args   = ( engine, bits, self.keys, self.generated,
+                           self.histogram, self.stop ),
+                daemon = True )
+            for i in range( num_workers ) ]
+
+        for worker in self.workers:
+            worker.start()
+
+    def get_key( self, timeout = None ):
+        '''
+        Returns a key pair (in the same format as gen_keys), waiting for
+        one to be generated if the pool is empty
+        '''
+
+        key = self.keys.get( timeout = timeout )
+        self.taken += 1
+        return key
+
+    def depth( self ):
+        '''
+        Approximate number of key pairs waiting in the pool
+        '''
+
+        return self.generated.value - self.taken
+
+    def stats( self ):
+        '''
+        Returns the pool depth, the total keys generated, the refill rate
+        (keys per second since the pool started) and the histogram of
+        generation times, as a dict
+        '''
+
+        elapsed   = time.perf_counter() - self.start_time
+        generated = self.generated.value
+
+        labels = [ "<={}s".format( edge ) for edge in HISTOGRAM_EDGES ]
+        labels.append( ">{}s".format( HISTOGRAM_EDGES[-1] ) )
+
+        return {
+            "depth":       self.depth(),
+            "size":        self.size,
+            "generated":   generated,
+            "taken":       self.taken,
+            "refill rate": generated / elapsed if elapsed > 0 else 0.0,
+            "histogram":   dict( zip( labels, self.histogram[:] ) ),
+        }
+
+    def close( self ):
+        '''
+        Stops the background workers
+        '''
+
+        self.stop.set()
+        for worker in self.workers:
+            worker.join( timeout = 1.0 )
+            if( worker.is_alive() ):
+                worker.terminate()
+
+    def __enter__( self ):
+        return self
+
+    def __exit__( self, exc_type, exc_value, traceback ):
+        self.close()
+
+if __name__ == "__main__":
+
+    # Small demo: fill a pool of 1024-bit keys, then drain it
+
+    with KeyPool( bits = 1024, size = 4, num_workers = 2 ) as pool:
+
+        time.sleep( 1.0 )
+        print( "After filling: {}".format( pool.stats() ) )
+
+        for i in range( 8 ):
+            start = time.perf_counter()
+            keys  = pool.get_key()
+            print( "Key {}: n = {}... ({:.3f} ms)".format(
+                i, str( keys["public key"]["n"] )[:16],
+                ( time.perf_counter() - start ) * 1e3 ) )
+
+        print( "After draining: {}".format( pool.stats() ) )
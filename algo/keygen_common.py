@@ -0,0 +1,246 @@
+#==========================================================
+# keygen_common.py
+#==========================================================
+# Key generation helpers shared by the naive, montgomery
+# and montgomery_hardware rsa_genkeys modules: the prime
+# search and the choice of the key exponents
+#
+# The demos run from inside a package directory, so they
+# add algo/ to the import path to find this module
+
+from math import gcd, sqrt
+from random import getrandbits, randint, seed
+# seed( 0xdeadbeef ) # Reproducible
+
+#------------------------------------------
+# sieve
+#------------------------------------------
+# Finds all primes below a limit with the Sieve of
+# Eratosthenes
+
+def sieve( limit ):
+
+    is_prime = [ True ] * limit
+    is_prime[0] = False
+    is_prime[1] = False
+
+    for i in range( 2, ( int( sqrt( limit ) ) + 1 ) ):
+        if( is_prime[i] ):
+            for j in range( i * i, limit, i ):
+                is_prime[j] = False
+
+    return [ i for i in range( limit ) if is_prime[i] ]
+
+# Table of small primes, used to screen out most composite
+# candidates before the more expensive Miller-Rabin test
+
+SMALL_PRIMES = sieve( 2048 )
+
+#------------------------------------------
+# millerRabin
+#------------------------------------------
+# Runs the Miller-Rabin test on an odd number n > 2
+# with the given witnesses. Returns False if any
+# witness proves n composite, and True otherwise
+
+def millerRabin( n, witnesses ):
+
+    # Write n - 1 as d * 2^s, with d odd
+
+    d = n - 1
+    s = 0
+    while( d % 2 == 0 ):
+        d = d >> 1
+        s += 1
+
+    for a in witnesses:
+
+        x = pow( a, d, n )
+        if( x == 1 or x == n - 1 ):
+            continue
+
+        # Square up to s - 1 times, looking for n - 1
+
+        for r in range( s - 1 ):
+            x = ( x * x ) % n
+            if( x == n - 1 ):
+                break
+        else:
+            return False
+
+    return True
+
+# Witness sets that make Miller-Rabin deterministic for all
+# n below the given bound
+
+DETERMINISTIC_WITNESSES = [
+    ( 2047,                      [ 2 ] ),
+    ( 1373653,                   [ 2, 3 ] ),
+    ( 25326001,                  [ 2, 3, 5 ] ),
+    ( 3215031751,                [ 2, 3, 5, 7 ] ),
+    ( 2152302898747,             [ 2, 3, 5, 7, 11 ] ),
+    ( 3474749660383,             [ 2, 3, 5, 7, 11, 13 ] ),
+    ( 341550071728321,           [ 2, 3, 5, 7, 11, 13, 17 ] ),
+    ( 3825123056546413051,       [ 2, 3, 5, 7, 11, 13, 17, 19, 23 ] ),
+    ( 318665857834031151167461,  [ 2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37 ] ),
+    ( 3317044064679887385961981, [ 2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41 ] ),
+]
+
+#------------------------------------------
+# millerRabinRounds
+#------------------------------------------
+# Number of random-witness rounds needed for an error
+# probability below 2^-80 on random candidates of the
+# given size (Handbook of Applied Cryptography, Table 4.4)
+
+def millerRabinRounds( bits ):
+
+    if  ( bits >= 1300 ): return 2
+    elif( bits >=  850 ): return 3
+    elif( bits >=  650 ): return 4
+    elif( bits >=  550 ): return 5
+    elif( bits >=  450 ): return 6
+    elif( bits >=  400 ): return 7
+    elif( bits >=  350 ): return 8
+    elif( bits >=  300 ): return 9
+    elif( bits >=  250 ): return 12
+    elif( bits >=  200 ): return 15
+    elif( bits >=  150 ): return 18
+    else:                 return 27
+
+#------------------------------------------
+# isProbablePrime
+#------------------------------------------
+# Tests an odd number n > 2 with Miller-Rabin, using a
+# deterministic witness set if one covers n, and random
+# witnesses otherwise
+
+def isProbablePrime( n ):
+
+    for bound, witnesses in DETERMINISTIC_WITNESSES:
+        if( n < bound ):
+            return millerRabin( n, witnesses )
+
+    rounds = millerRabinRounds( n.bit_length() )
+    return millerRabin( n, [ randint( 2, n - 2 ) for i in range( rounds ) ] )
+
+#------------------------------------------
+# isPrime
+#------------------------------------------
+# Determines if a number is prime or not
+#
+# Candidates are first screened against the table of
+# small primes, then tested with Miller-Rabin
+
+def isPrime( n ):
+
+    if( n < 2 ):
+        return False
+
+    # Check for small factors
+    for p in SMALL_PRIMES:
+        if( p * p > n ):
+            return True
+        if( n % p == 0 ):
+            return False
+
+    return isProbablePrime( n )
+
+#------------------------------------------
+# sieveCandidates
+#------------------------------------------
+# Generates candidate primes of the given size (with the
+# top two bits set), starting from a random odd base and
+# stepping by 2
+#
+# The residues of the candidate modulo each small prime
+# are updated incrementally at each step, and only
+# candidates with no residue of 0 (no small factor) are
+# yielded. If we run out of candidates of the given size,
+# we start again from a new random base
+
+def sieveCandidates( bits ):
+
+    # Only screen with primes smaller than every candidate, so that a
+    # small prime is never ruled out as its own factor
+
+    primes = [ p for p in SMALL_PRIMES if p < ( 1 << ( bits - 1 ) ) ]
+    limit  = 1 << bits
+
+    while( True ):
+
+        candidate = getrandbits( bits ) | ( 0b11 << ( bits - 2 ) ) | 1
+        residues  = [ candidate % p for p in primes ]
+
+        while( candidate < limit ):
+
+            if( 0 not in residues ):
+                yield candidate
+
+            candidate += 2
+            residues = [ ( r + 2 ) % p for r, p in zip( residues, primes ) ]
+
+#------------------------------------------
+# randomPrime
+#------------------------------------------
+# Finds a random prime of the given size, with the top
+# two bits set so that the product of two such primes
+# has exactly twice as many bits
+#
+# Only candidates that survive the sieve are given to
+# the Miller-Rabin test
+
+def randomPrime( bits ):
+
+    for candidate in sieveCandidates( bits ):
+        if( isProbablePrime( candidate ) ):
+            return candidate
+
+#------------------------------------------
+# modinv
+#------------------------------------------
+# Computes the inverse of a modulo m with the extended
+# Euclidean algorithm, using only exact integer
+# arithmetic
+
+def modinv( a, m ):
+
+    #         old  new
+    r = [ a % m,   m ]
+    s = [     1,   0 ]
+
+    while( r[1] != 0 ):
+
+        quotient = r[0] // r[1]
+
+        r = [ r[1], r[0] - ( quotient * r[1] ) ]
+        s = [ s[1], s[0] - ( quotient * s[1] ) ]
+
+    assert r[0] == 1, "{} has no inverse modulo {}".format( a, m )
+
+    # Correct for negative sign
+    return s[0] % m
+
+#------------------------------------------
+# choosePublicExponent
+#------------------------------------------
+# Chooses the public exponent e for a totient. We use
+# 65537 when we can; otherwise, we step down through the
+# odd numbers below it (and below the totient) until we
+# find one coprime with the totient
+
+def choosePublicExponent( totient ):
+
+    e = 65537
+
+    if( e >= totient ):
+        e = totient - 1
+        if( e % 2 == 0 ):
+            e -= 1
+
+    while( gcd( e, totient ) != 1 ):
+        e -= 2
+
+    assert e > 1, "No valid public exponent for totient {}".format( totient )
+
+    return e
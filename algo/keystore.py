@@ -0,0 +1,192 @@
+#==========================================================
+# keystore.py
+#==========================================================
+# An on-disk cache of generated RSA key pairs, so that
+# repeated test and fuzzing runs don't pay for key
+# generation every time
+#
+# Keys are identified by ( bits, seed, index ): key i of a
+# seed is always generated from the same random state, so
+# a failing key can be regenerated from those three values
+# alone. Each ( bits, seed ) has one file of fixed-size
+# binary records, which readers mmap rather than parse.
+# Run from the algo directory, like test.py:
+#
+#   from keystore import KeyStore
+#
+#   store = KeyStore( bits = 32, seed = 0 )
+#   store.ensure( 1000 )
+#   n, e, d, p, q, dP, dQ, qInv = store.get( 42 )
+
+import importlib
+import mmap
+import os
+import random
+import struct
+
+# Fields stored for each key, in record order
+
+KEY_FIELDS = [ "n", "e", "d", "p", "q", "dP", "dQ", "qInv" ]
+
+# File header: magic, format version, key size (bits) and
+# field width (bytes)
+
+HEADER_FORMAT = "<4sHHI"
+HEADER_SIZE   = struct.calcsize( HEADER_FORMAT )
+MAGIC         = b"RSAK"
+VERSION       = 1
+
+DEFAULT_DIR = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), ".keycache" )
+
+#------------------------------------------
+# gen_key
+#------------------------------------------
+# Generates key index of a seed, as a tuple in KEY_FIELDS
+# order. gen_keys draws from the global random state, so
+# it is re-seeded for the key (making this deterministic)
+# and then restored, leaving the caller's sequence alone
+
+def gen_key( bits, seed, index, engine_name = "naive" ):
+
+    rsa_genkeys = importlib.import_module( engine_name + ".rsa_genkeys" )
+
+    state = random.getstate()
+    random.seed( "{}:{}:{}".format( bits, seed, index ) )
+    keys = rsa_genkeys.gen_keys( bits )
+    random.setstate( state )
+
+    private_key = keys[ "private key" ]
+    return ( private_key[ "n" ], keys[ "public key" ][ "e" ], private_key[ "d" ],
+             private_key[ "p" ], private_key[ "q" ], private_key[ "dP" ],
+             private_key[ "dQ" ], private_key[ "qInv" ] )
+
+#------------------------------------------
+# KeyStore
+#------------------------------------------
+# The cached keys for one ( bits, seed ) pair
+
+class KeyStore:
+
+    def __init__( self, bits = 32, seed = 0, path = DEFAULT_DIR ):
+        '''
+        Opens (without generating anything) the cache file for the given
+        key size and seed, inside the directory path
+        '''
+
+        self.bits  = bits
+        self.seed  = seed
+        self.width = ( bits + 7 ) // 8
+
+        self.record_size = self.width * len( KEY_FIELDS )
+        self.filename    = os.path.join( path, "keys_{}_{}.bin".format( bits, seed ) )
+
+        self.map = None
+
+    def __len__( self ):
+        '''
+        Number of keys currently stored on disk
+        '''
+
+        if( not os.path.exists( self.filename ) ):
+            return 0
+
+        size = os.path.getsize( self.filename ) - HEADER_SIZE
+        return max( size, 0 ) // self.record_size
+
+    def pack( self, key ):
+        return b"".join( field.to_bytes( self.width, "little" ) for field in key )
+
+    def append( self, keys, start ):
+        '''
+        Stores key tuples (in KEY_FIELDS order) from index start onwards,
+        keeping the keys before start and creating the file if needed
+
+        The new file is written alongside and then renamed over the old
+        one, so concurrent readers (and writers racing to fill the same
+        miss) only ever see a complete file
+        '''
+
+        self.close()
+        os.makedirs( os.path.dirname( self.filename ), exist_ok = True )
+
+        if( start > 0 ):
+            with open( self.filename, "rb" ) as f:
+                contents = f.read( HEADER_SIZE + start * self.record_size )
+        else:
+            contents = struct.pack( HEADER_FORMAT, MAGIC, VERSION, self.bits, self.width )
+
+        temp = "{}.{}.tmp".format( self.filename, os.getpid() )
+        with open( temp, "wb" ) as f:
+            f.write( contents )
+            for key in keys:
+                f.write( self.pack( key ) )
+
+        os.replace( temp, self.filename )
+
+    def ensure( self, count, generate = None ):
+        '''
+        Makes sure at least count keys are stored, generating any that are
+        missing. generate( bits, seed, indices ) can be given to produce
+        them some other way (such as in parallel); it must return the key
+        tuples in order
+        '''
+
+        have = len( self )
+        if( have >= count ):
+            return
+
+        indices = range( have, count )
+
+        if( generate is None ):
+            keys = [ gen_key( self.bits, self.seed, index ) for index in indices ]
+        else:
+            keys = generate( self.bits, self.seed, indices )
+
+        self.append( keys, have )
+
+    def keys( self, count ):
+        '''
+        Returns the first count keys, generating any that are missing
+        '''
+
+        self.ensure( count )
+        return [ self.get( index ) for index in range( count ) ]
+
+    def open( self ):
+        '''
+        Maps the file into memory for reading, checking its header
+        '''
+
+        if( self.map is not None ):
+            return
+
+        with open( self.filename, "rb" ) as f:
+            self.map = mmap.mmap( f.fileno(), 0, access = mmap.ACCESS_READ )
+
+        magic, version, bits, width = struct.unpack_from( HEADER_FORMAT, self.map )
+
+        if( magic != MAGIC or version != VERSION or bits != self.bits or width != self.width ):
+            self.close()
+            raise ValueError( "{} is not a valid {}-bit key file".format(
+                self.filename, self.bits ) )
+
+    def get( self, index ):
+        '''
+        Returns key index as a tuple in KEY_FIELDS order
+        '''
+
+        self.open()
+
+        if( index < 0 or HEADER_SIZE + ( index + 1 ) * self.record_size > len( self.map ) ):
+            raise IndexError( "Key {} is not in {}".format( index, self.filename ) )
+
+        start = HEADER_SIZE + index * self.record_size
+
+        return tuple(
+            int.from_bytes( self.map[ offset : offset + self.width ], "little" )
+            for offset in range( start, start + self.record_size, self.width ) )
+
+    def close( self ):
+        if( self.map is not None ):
+            self.map.close()
+            self.map = None
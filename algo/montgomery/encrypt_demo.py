@@ -3,7 +3,13 @@
 #==========================================================
 # Demo code for encrypting messages
 
-from rsa_crypt import encrypt
+import os
+import sys
+
+# rsa_crypt imports exp_common from algo/
+sys.path.insert( 0, os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), ".." ) )
+
+from rsa_crypt import encrypt_many
 
 # Get Input
 
@@ -17,9 +23,7 @@ message_char_nums = [ ord( char ) for char in message ]
 
 # Encrypt Data
 
-encrypted_data = []
-for i in range( len( message_char_nums ) ):
-    encrypted_data.append( encrypt( message_char_nums[i], e, n ) )
+encrypted_data = list( encrypt_many( message_char_nums, e, n ) )
 
 # Convert data to strings
 message_char_nums = [ str( num ) for num in message_char_nums ]
@@ -3,6 +3,12 @@
 #==========================================================
 # Demo code for generating RSA keys
 
+import os
+import sys
+
+# rsa_genkeys imports keygen_common from algo/
+sys.path.insert( 0, os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), ".." ) )
+
 from rsa_genkeys import gen_keys
 
 # Get the keys to use
@@ -11,6 +17,13 @@ n = keys['public key']['n']
 e = keys['public key']['e']
 d = keys['private key']['d']
 
+# CRT parameters, for faster decryption
+p    = keys['private key']['p']
+q    = keys['private key']['q']
+dP   = keys['private key']['dP']
+dQ   = keys['private key']['dQ']
+qInv = keys['private key']['qInv']
+
 print( "Public-Private key pair:")
 print( " - Public Key:" )
 print( "    - n: {}".format( n ) )
@@ -18,3 +31,9 @@ print( "    - e: {}".format( e ) )
 print( " - Private Key:" )
 print( "    - n: {}".format( n ) )
 print( "    - d: {}".format( d ) )
+print( " - CRT Parameters:" )
+print( "    - p:    {}".format( p ) )
+print( "    - q:    {}".format( q ) )
+print( "    - dP:   {}".format( dP ) )
+print( "    - dQ:   {}".format( dQ ) )
+print( "    - qInv: {}".format( qInv ) )
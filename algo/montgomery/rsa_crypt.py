@@ -5,6 +5,10 @@
 
 import math
 
+from collections import OrderedDict, namedtuple
+
+from exp_common import MulStats, window_size_for, recode_exponent
+
 #------------------------------------------
 # MontMultiplier
 #------------------------------------------
@@ -50,7 +54,7 @@ class MontMultiplier:
 
             # Update values
 
-            quotient = int( r[1]/r[0] )
+            quotient = r[1] // r[0]
 
             r = [ r[1] - ( quotient * r[0] ), r[0] ]
             s = [ s[1] - ( quotient * s[0] ), s[0] ]
@@ -126,53 +130,778 @@ class MontMultiplier:
         return string_repr
 
 
+#------------------------------------------
+# MontMultiplierCIOS
+#------------------------------------------
+# Defines a multi-precision Montgomery Multiplier
+# for arbitrary-width moduli, using word-level
+# Coarsely Integrated Operand Scanning (CIOS)
+
+class MontMultiplierCIOS:
+
+    def __init__( self, mod, word_bits = 32 ):
+        '''
+        Here, mod is the modulus we perform multiplication under, and
+        word_bits is the size of each word (limb) we operate on
+
+        R is picked from the bit length of the modulus, as the smallest
+        power of 2^word_bits that is greater than mod
+        '''
+
+        # Assert preconditions on values (mod must be odd to be
+        # coprime with R)
+        assert mod > 0 and ( mod % 2 ) == 1
+        assert word_bits > 0
+
+        # Store values
+        self.mod       = mod
+        self.word_bits = word_bits
+        self.word_mask = ( 1 << word_bits ) - 1
+
+        # Compute the number of words needed to hold the modulus, which
+        # determines R
+        self.num_words = max( 1, -( -mod.bit_length() // word_bits ) )
+        self.num_bits  = self.num_words * word_bits
+        self.R         = 1 << self.num_bits
+
+        # Compute N' = -N^{-1} (mod 2^word_bits). Only a single word of
+        # N' is needed, as we reduce one word at a time. Each Newton
+        # iteration doubles the number of correct low bits of N^{-1}
+
+        inverse = 1
+        for i in range( word_bits.bit_length() ):
+            inverse = ( inverse * ( 2 - ( mod * inverse ) ) ) & self.word_mask
+
+        self.N_reciprocal = ( -inverse ) & self.word_mask
+
+        # Lastly, we can pre-calculate R^2 (mod N) for ease of
+        # converting numbers into N-residue format
+
+        self.convert_in_factor = ( self.R ** 2 ) % self.mod
+
+    def multiply( self, a, b ):
+        '''
+        Performs an instance of Montgomery multiplication
+
+        Assumes that a and b are in N-residue form, and computes the output
+        in the same form
+
+        Each iteration multiplies b by one word of a, then adds a multiple
+        of N to clear the lowest word of the running total, which is then
+        shifted out. The row operations over the words of b and N are left
+        to Python's integers
+        '''
+
+        t = 0
+
+        for i in range( self.num_words ):
+
+            # Multiply in the next word of a
+
+            t = t + ( ( a & self.word_mask ) * b )
+            a = a >> self.word_bits
+
+            # Reduce by one word
+
+            m = ( ( t & self.word_mask ) * self.N_reciprocal ) & self.word_mask
+            t = ( t + ( m * self.mod ) ) >> self.word_bits
+
+        if( t >= self.mod ):
+            t = t - self.mod
+
+        return t
+
+    def convert_in( self, x ):
+        '''
+        Converts a number into N-residue format
+
+        Returns: x' = xR (mod N)
+        '''
+
+        return self.multiply( x, self.convert_in_factor )
+
+    def convert_out( self, x_prime ):
+        '''
+        Converts a number out of N-residue format
+
+        Returns: x = x'R^{-1} (mod N)
+        '''
+
+        return self.multiply( x_prime, 1 )
+
+    def __str__( self ):
+        '''
+        String representation (for debugging)
+        '''
+
+        string_repr =  "MontMultCIOS Instance\n"
+        string_repr += " - R:         {}\n".format( self.R )
+        string_repr += " - N:         {}\n".format( self.mod )
+        string_repr += " - N' (word): {}\n".format( self.N_reciprocal )
+        string_repr += " - R^2 mod N: {}\n".format( self.convert_in_factor )
+        string_repr += " - word_bits: {}\n".format( self.word_bits )
+        string_repr += " - num_words: {}\n".format( self.num_words )
+        return string_repr
+
+#------------------------------------------
+# MontMultiplierCIOSBranchless
+#------------------------------------------
+# A CIOS Montgomery Multiplier whose final reduction
+# doesn't branch on the result, for use where the
+# timing of each multiply mustn't depend on its data
+
+class MontMultiplierCIOSBranchless( MontMultiplierCIOS ):
+
+    def multiply( self, a, b ):
+        '''
+        Performs an instance of Montgomery multiplication, as in
+        MontMultiplierCIOS, but always subtracts N and then adds it back
+        under a mask
+
+        Before the final reduction t < 2N < 2R, so t - N is negative
+        exactly when its bits above num_bits are set. Shifting those down
+        gives a mask of all ones (-1) or all zeros (0)
+        '''
+
+        t = 0
+
+        for i in range( self.num_words ):
+
+            # Multiply in the next word of a
+
+            t = t + ( ( a & self.word_mask ) * b )
+            a = a >> self.word_bits
+
+            # Reduce by one word
+
+            m = ( ( t & self.word_mask ) * self.N_reciprocal ) & self.word_mask
+            t = ( t + ( m * self.mod ) ) >> self.word_bits
+
+        t    = t - self.mod
+        mask = t >> self.num_bits
+
+        return t + ( self.mod & mask )
+
+# Squarings and multiplies counted by this module's
+# exponentiation functions
+
+mul_stats = MulStats()
+
+# Number of bases sharing one subset table in
+# multi-exponentiation; the table has 2^MULTI_EXP_GROUP
+# entries
+
+MULTI_EXP_GROUP = 4
+
+#------------------------------------------
+# MontContext
+#------------------------------------------
+# Holds the Montgomery state for a single modulus, so
+# that setup is paid once per key rather than once per
+# message. Callers can hold onto a context across a
+# batch of exponentiations under the same key
+
+class MontContext:
+
+    def __init__( self, modulus, word_bits = 32, branchless = False ):
+        '''
+        Sets up a Montgomery multiplier for the given modulus, with
+        word_bits-sized limbs
+
+        If branchless, the multiplier's final reduction doesn't branch on
+        the result (see MontMultiplierCIOSBranchless)
+        '''
+
+        self.modulus    = modulus
+        self.word_bits  = word_bits
+        self.branchless = branchless
+
+        if( branchless ):
+            self.MontMult = MontMultiplierCIOSBranchless( modulus, word_bits )
+        else:
+            self.MontMult = MontMultiplierCIOS( modulus, word_bits )
+
+        # Pre-compute 1 in N-residue format, as the starting value for
+        # every exponentiation
+        self.one = self.MontMult.convert_in( 1 )
+
+    def mod_exp( self, base, exponent ):
+        '''
+        Computes ( base ** exponent ) % modulus using modular
+        exponentiation with Montgomery multiplication
+        '''
+
+        # Adapted from Schneier, Bruce (1996). Applied Cryptography: Protocols, Algorithms, and Source Code in C, Second Edition (2nd ed.)
+
+        MontMult = self.MontMult
+
+        result = self.one
+        base   = MontMult.convert_in( base % self.modulus )
+
+        while( exponent > 0 ):
+
+            if( ( exponent % 2 ) == 1 ):
+                result = MontMult.multiply( result, base )
+                mul_stats.multiplies += 1
+
+            exponent = exponent >> 1
+            base = MontMult.multiply( base, base )
+            mul_stats.squarings += 1
+
+        # Convert out of N-residue format
+        return MontMult.convert_out( result )
+
+    def mod_exp_ladder( self, base, exponent, num_bits = None ):
+        '''
+        Computes ( base ** exponent ) % modulus using a Montgomery ladder
+
+        Every exponent bit costs one multiply and one squaring, and the
+        operands are swapped with a mask rather than a branch, so the
+        sequence of operations doesn't depend on the exponent's bits.
+        num_bits bits are processed (by default, the length of the
+        modulus), so that leading zeros are hidden as well
+
+        This keeps the schedule uniform at the Python level; Python's
+        integers themselves make no constant-time guarantees
+        '''
+
+        if( num_bits is None ):
+            num_bits = max( self.modulus.bit_length(), exponent.bit_length() )
+
+        assert exponent.bit_length() <= num_bits
+
+        MontMult = self.MontMult
+
+        # Invariant: r1 = r0 * base
+
+        r0 = self.one
+        r1 = MontMult.convert_in( base % self.modulus )
+
+        swap = 0
+
+        for i in reversed( range( num_bits ) ):
+
+            bit = ( exponent >> i ) & 1
+
+            # Conditionally swap r0 and r1, merging this bit's swap with
+            # undoing the last one
+
+            mask = -( bit ^ swap )
+            diff = ( r0 ^ r1 ) & mask
+            r0   = r0 ^ diff
+            r1   = r1 ^ diff
+            swap = bit
+
+            r1 = MontMult.multiply( r0, r1 )
+            r0 = MontMult.multiply( r0, r0 )
+
+        mask = -swap
+        diff = ( r0 ^ r1 ) & mask
+        r0   = r0 ^ diff
+
+        mul_stats.multiplies += num_bits
+        mul_stats.squarings  += num_bits
+
+        # Convert out of N-residue format
+        return MontMult.convert_out( r0 )
+
+    def multi_mod_exp( self, pairs ):
+        '''
+        Computes the product of ( base ** exponent ) for every
+        ( base, exponent ) in pairs, modulo modulus, with Straus' method
+
+        The exponents are scanned together from their top bit down, so a
+        single chain of squarings is shared by every base. The bases are
+        split into groups of up to MULTI_EXP_GROUP, and each group gets a
+        table of the products of every subset of its bases, so that the
+        group's bits at each position cost at most one multiply
+        '''
+
+        MontMult = self.MontMult
+
+        pairs = list( pairs )
+
+        # Build the subset tables: table[ mask ] is the product of the
+        # bases whose bits are set in mask
+
+        groups = []
+
+        for start in range( 0, len( pairs ), MULTI_EXP_GROUP ):
+            group = pairs[ start : start + MULTI_EXP_GROUP ]
+
+            bases     = [ MontMult.convert_in( base % self.modulus ) for base, exponent in group ]
+            exponents = [ exponent for base, exponent in group ]
+
+            table = [ self.one ]
+            for mask in range( 1, 1 << len( group ) ):
+                low  = ( mask & -mask ).bit_length() - 1
+                rest = mask & ( mask - 1 )
+
+                if( rest == 0 ):
+                    table.append( bases[ low ] )
+                else:
+                    table.append( MontMult.multiply( table[ rest ], bases[ low ] ) )
+                    mul_stats.multiplies += 1
+
+            groups.append( ( exponents, table ) )
+
+        # Shared square-and-multiply over the joint exponent bits. Leading
+        # squarings of 1 are skipped
+
+        num_bits = max( [ exponent.bit_length() for base, exponent in pairs ], default = 0 )
+
+        result = None
+
+        for i in reversed( range( num_bits ) ):
+
+            if( result is not None ):
+                result = MontMult.multiply( result, result )
+                mul_stats.squarings += 1
+
+            for exponents, table in groups:
+
+                mask = 0
+                for j, exponent in enumerate( exponents ):
+                    mask |= ( ( exponent >> i ) & 1 ) << j
+
+                if( mask == 0 ):
+                    continue
+
+                if( result is None ):
+                    result = table[ mask ]
+                else:
+                    result = MontMult.multiply( result, table[ mask ] )
+                    mul_stats.multiplies += 1
+
+        if( result is None ):
+            result = self.one
+
+        # Convert out of N-residue format
+        return MontMult.convert_out( result )
+
+    def mod_exp_window( self, base, exponent, window_size = None ):
+        '''
+        Computes ( base ** exponent ) % modulus using sliding window
+        exponentiation with Montgomery multiplication
+
+        If not given, the window size is chosen from the length of the
+        exponent
+        '''
+
+        if( window_size is None ):
+            window_size = window_size_for( exponent.bit_length() )
+
+        windows, final_squarings = recode_exponent( exponent, window_size )
+
+        return self.mod_exp_recoded( base, window_size, windows, final_squarings )
+
+    def mod_exp_recoded( self, base, window_size, windows, final_squarings ):
+        '''
+        Performs sliding window exponentiation with an exponent that has
+        already been split into windows by recode_exponent, so that the
+        recoding can be shared across many bases
+        '''
+
+        MontMult = self.MontMult
+
+        base = MontMult.convert_in( base % self.modulus )
+
+        # Pre-compute the odd powers base^1, base^3, ..., base^( 2^w - 1 ),
+        # all in N-residue format
+
+        table = [ base ]
+
+        if( window_size > 1 ):
+            base_squared = MontMult.multiply( base, base )
+            mul_stats.squarings += 1
+
+            for i in range( ( 1 << ( window_size - 1 ) ) - 1 ):
+                table.append( MontMult.multiply( table[-1], base_squared ) )
+                mul_stats.multiplies += 1
+
+        # The first window is taken directly from the table, rather than
+        # squaring and multiplying into 1
+
+        result = self.one
+
+        for idx, ( squarings, value ) in enumerate( windows ):
+
+            if( idx == 0 ):
+                result = table[ value >> 1 ]
+                continue
+
+            for i in range( squarings ):
+                result = MontMult.multiply( result, result )
+            mul_stats.squarings += squarings
+
+            result = MontMult.multiply( result, table[ value >> 1 ] )
+            mul_stats.multiplies += 1
+
+        for i in range( final_squarings ):
+            result = MontMult.multiply( result, result )
+        mul_stats.squarings += final_squarings
+
+        # Convert out of N-residue format
+        return MontMult.convert_out( result )
+
+#------------------------------------------
+# MontContextCache
+#------------------------------------------
+# A bounded, least-recently-used cache of MontContexts,
+# keyed by modulus, word size and reduction type
+
+CacheInfo = namedtuple( "CacheInfo",
+                        [ "hits", "misses", "evictions", "maxsize", "currsize" ] )
+
+class MontContextCache:
+
+    def __init__( self, maxsize = 16 ):
+        '''
+        maxsize is the number of contexts held before the least recently
+        used one is evicted
+        '''
+
+        assert maxsize > 0
+
+        self.maxsize  = maxsize
+        self.contexts = OrderedDict()
+
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+
+    def get( self, modulus, word_bits = 32, branchless = False ):
+        '''
+        Returns the context for the given modulus, creating (and possibly
+        evicting another context) on a miss
+        '''
+
+        key = ( modulus, word_bits, branchless )
+
+        context = self.contexts.get( key )
+        if( context is not None ):
+            self.hits += 1
+            self.contexts.move_to_end( key )
+            return context
+
+        self.misses += 1
+        context = MontContext( modulus, word_bits, branchless )
+        self.contexts[key] = context
+
+        if( len( self.contexts ) > self.maxsize ):
+            self.contexts.popitem( last = False )
+            self.evictions += 1
+
+        return context
+
+    def info( self ):
+        '''
+        Returns the hit/miss/eviction counters of the cache
+        '''
+
+        return CacheInfo( self.hits, self.misses, self.evictions,
+                          self.maxsize, len( self.contexts ) )
+
+    def clear( self ):
+        '''
+        Removes all contexts and resets the counters
+        '''
+
+        self.contexts.clear()
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+
+# Shared cache used by mod_exp, encrypt and decrypt
+
+context_cache = MontContextCache()
+
+def get_context( modulus, word_bits = 32, branchless = False ):
+    return context_cache.get( modulus, word_bits, branchless )
+
 #------------------------------------------
 # mod_exp
 #------------------------------------------
 # Computes ( base ** exponent ) % modulus
 # using modular exponentiation
 
-def mod_exp( base, exponent, modulus ):
+def mod_exp( base, exponent, modulus, word_bits = 32 ):
+    return get_context( modulus, word_bits ).mod_exp( base, exponent )
 
-    # Adapted from Schneier, Bruce (1996). Applied Cryptography: Protocols, Algorithms, and Source Code in C, Second Edition (2nd ed.)
-    # Using Montgomery multiplication
+#------------------------------------------
+# mod_exp_window
+#------------------------------------------
+# Computes ( base ** exponent ) % modulus
+# using sliding window exponentiation, which
+# uses a table of odd powers of the base to
+# process several exponent bits per multiply
 
-    result = 1
-    base = base % modulus
+def mod_exp_window( base, exponent, modulus, window_size = None, word_bits = 32 ):
+    return get_context( modulus, word_bits ).mod_exp_window( base, exponent, window_size )
 
-    # Set up Montgomery multiplier
+#------------------------------------------
+# mod_exp_ladder
+#------------------------------------------
+# Computes ( base ** exponent ) % modulus
+# using a Montgomery ladder with branchless
+# reductions, so that the sequence of operations
+# doesn't depend on the exponent
 
-    MontMult = MontMultiplier( modulus, ( 1 << 32 ) )
-    
-    result = MontMult.convert_in( result )
-    base   = MontMult.convert_in( base )
+def mod_exp_ladder( base, exponent, modulus, word_bits = 32 ):
+    return get_context( modulus, word_bits, branchless = True ).mod_exp_ladder( base, exponent )
 
-    while( exponent > 0 ):
+#------------------------------------------
+# multi_mod_exp
+#------------------------------------------
+# Computes the product of ( base ** exponent ) over a
+# list of ( base, exponent ) pairs, modulo modulus,
+# sharing one chain of squarings between them
 
-        if( ( exponent % 2 ) == 1 ):
-            result = MontMult.multiply( result, base )
-        
-        exponent = exponent >> 1
-        base = MontMult.multiply( base, base )
+def multi_mod_exp( pairs, modulus, word_bits = 32 ):
+    return get_context( modulus, word_bits ).multi_mod_exp( pairs )
 
-    # Convert out of N-residue format
-    result = MontMult.convert_out( result )
-    
-    return result
+#------------------------------------------
+# fixed_base_window_for
+#------------------------------------------
+# Picks the digit size k for fixed-base exponentiation,
+# minimizing the number of multiplies: one per digit of
+# the exponent, plus 2^k to combine them
+
+def fixed_base_window_for( exponent_bits ):
+    return min( range( 1, 9 ),
+                key = lambda k: -( -exponent_bits // k ) + ( 1 << k ) )
+
+#------------------------------------------
+# FixedBase
+#------------------------------------------
+# Precomputed powers of a single base, for exponentiating
+# it with many different exponents
+#
+# The table holds base^( 2^( k*i ) ) in N-residue format,
+# so that writing the exponent in base 2^k as digits e_i,
+# base^e is the product of table[i]^e_i. Yao's method
+# gathers the table entries by digit value, so that no
+# squarings are needed at all
+
+class FixedBase:
+
+    def __init__( self, base, context, window_size = None, exponent_bits = None ):
+        '''
+        Builds the table for base under the context's modulus, covering
+        exponents of up to exponent_bits (by default, the length of the
+        modulus). The digit size is chosen from that if not given
+        '''
+
+        if( exponent_bits is None ):
+            exponent_bits = context.modulus.bit_length()
+
+        if( window_size is None ):
+            window_size = fixed_base_window_for( exponent_bits )
+
+        self.base        = base
+        self.context     = context
+        self.window_size = window_size
+        self.digit_mask  = ( 1 << window_size ) - 1
+
+        self.table = [ context.MontMult.convert_in( base % context.modulus ) ]
+        self.extend( exponent_bits )
+
+    def extend( self, exponent_bits ):
+        '''
+        Adds table entries until exponents of exponent_bits are covered
+        '''
+
+        MontMult = self.context.MontMult
+
+        num_digits = -( -exponent_bits // self.window_size )
+
+        while( len( self.table ) < num_digits ):
+            power = self.table[-1]
+            for i in range( self.window_size ):
+                power = MontMult.multiply( power, power )
+            mul_stats.squarings += self.window_size
+
+            self.table.append( power )
+
+    def nbytes( self ):
+        '''
+        Approximate memory held by the table, in bytes
+        '''
+
+        return len( self.table ) * ( self.context.MontMult.num_bits // 8 )
+
+    def mod_exp( self, exponent ):
+        '''
+        Computes ( base ** exponent ) % modulus from the table, extending
+        it first if the exponent is longer than it covers
+        '''
+
+        self.extend( exponent.bit_length() )
+
+        MontMult = self.context.MontMult
+
+        # Group the table entries by the value of their digit
+
+        buckets = [ [] for i in range( 1 << self.window_size ) ]
+
+        i = 0
+        while( exponent > 0 ):
+            buckets[ exponent & self.digit_mask ].append( self.table[i] )
+            exponent = exponent >> self.window_size
+            i += 1
+
+        # Working down from the largest digit value, partial holds the
+        # product of every entry with a digit of at least j, and is
+        # multiplied into the result once per value, so that each entry
+        # ends up raised to its digit. Multiplies by 1 are skipped
+
+        result  = None
+        partial = None
+
+        for j in range( self.digit_mask, 0, -1 ):
+
+            for entry in buckets[j]:
+                if( partial is None ):
+                    partial = entry
+                else:
+                    partial = MontMult.multiply( partial, entry )
+                    mul_stats.multiplies += 1
+
+            if( partial is not None ):
+                if( result is None ):
+                    result = partial
+                else:
+                    result = MontMult.multiply( result, partial )
+                    mul_stats.multiplies += 1
+
+        if( result is None ):
+            result = self.context.one
+
+        # Convert out of N-residue format
+        return MontMult.convert_out( result )
+
+#------------------------------------------
+# FixedBaseCache
+#------------------------------------------
+# A least-recently-used cache of FixedBase tables, keyed
+# by base, modulus and word size, holding at most
+# max_bytes of tables
+
+FixedBaseCacheInfo = namedtuple( "FixedBaseCacheInfo",
+                                 [ "hits", "misses", "evictions", "max_bytes", "curr_bytes" ] )
+
+class FixedBaseCache:
+
+    def __init__( self, max_bytes = 1 << 20 ):
+        '''
+        max_bytes is the memory budget for all tables; the least recently
+        used tables are evicted to stay within it
+        '''
+
+        assert max_bytes > 0
+
+        self.max_bytes  = max_bytes
+        self.curr_bytes = 0
+        self.tables     = OrderedDict()
+
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+
+    def get( self, base, modulus, word_bits = 32, exponent_bits = 0 ):
+        '''
+        Returns the table for base under modulus, building it on a miss,
+        and extending it to cover exponents of exponent_bits. A table
+        larger than the whole budget is returned without being cached
+        '''
+
+        key = ( base, modulus, word_bits )
+
+        table = self.tables.pop( key, None )
+        if( table is not None ):
+            self.hits += 1
+            self.curr_bytes -= table.nbytes()
+        else:
+            self.misses += 1
+            table = FixedBase( base, get_context( modulus, word_bits ) )
+
+        table.extend( exponent_bits )
+        self.add( key, table )
+
+        return table
+
+    def add( self, key, table ):
+        '''
+        Inserts a table as the most recently used, evicting others to stay
+        within the budget
+        '''
+
+        size = table.nbytes()
+        if( size > self.max_bytes ):
+            return
+
+        self.tables[key] = table
+        self.curr_bytes += size
+
+        while( self.curr_bytes > self.max_bytes ):
+            old_key, old_table = self.tables.popitem( last = False )
+            self.curr_bytes -= old_table.nbytes()
+            self.evictions += 1
+
+    def info( self ):
+        '''
+        Returns the hit/miss/eviction counters and memory use of the cache
+        '''
+
+        return FixedBaseCacheInfo( self.hits, self.misses, self.evictions,
+                                   self.max_bytes, self.curr_bytes )
+
+    def clear( self ):
+        '''
+        Removes all tables and resets the counters
+        '''
+
+        self.tables.clear()
+        self.curr_bytes = 0
+        self.hits       = 0
+        self.misses     = 0
+        self.evictions  = 0
+
+# Shared cache used by mod_exp_fixed_base
+
+fixed_base_cache = FixedBaseCache()
+
+#------------------------------------------
+# mod_exp_fixed_base
+#------------------------------------------
+# Computes ( base ** exponent ) % modulus
+# using a cached table of precomputed powers of
+# the base, for when one base is used with many
+# exponents
+
+def mod_exp_fixed_base( base, exponent, modulus, word_bits = 32 ):
+    table = fixed_base_cache.get( base, modulus, word_bits, exponent.bit_length() )
+    return table.mod_exp( exponent )
 
 
 #------------------------------------------
 # encrypt
 #------------------------------------------
 # Encrypts a message using our public key
+#
+# A context for n can be passed in to skip the
+# cache lookup when encrypting a batch
 
-def encrypt( message, e, n ):
+def encrypt( message, e, n, context = None ):
 
     if( message < 0 or message >= n ):
         print( "ERROR: You message doesn't follow 0 <= message < n. Try padding your message" )
         return
 
-    ciphertext = mod_exp( message, e, n )
+    if( context is None ):
+        context = get_context( n )
+
+    ciphertext = context.mod_exp( message, e )
     return ciphertext
 
 #------------------------------------------
@@ -180,7 +909,93 @@ def encrypt( message, e, n ):
 #------------------------------------------
 # Decrypt a message using our private key
 
-def decrypt( ciphertext, d, n ):
-    message = mod_exp( ciphertext, d, n )
+def decrypt( ciphertext, d, n, context = None ):
+
+    if( context is None ):
+        context = get_context( n )
+
+    message = context.mod_exp( ciphertext, d )
     return message
 
+#------------------------------------------
+# decrypt_ladder
+#------------------------------------------
+# Decrypt a message using our private key, with the
+# side-channel-hardened Montgomery ladder
+#
+# A context for n can be passed in, but must have
+# been made with branchless = True
+
+def decrypt_ladder( ciphertext, d, n, context = None ):
+
+    if( context is None ):
+        context = get_context( n, branchless = True )
+
+    assert context.branchless
+
+    message = context.mod_exp_ladder( ciphertext, d )
+    return message
+
+#------------------------------------------
+# encrypt_many
+#------------------------------------------
+# Encrypts a stream of messages (any iterable of
+# integers, such as a list or a buffer) under one
+# public key, yielding each ciphertext in turn
+#
+# One context is used for the whole stream, and the
+# exponent is recoded once
+
+def encrypt_many( messages, e, n, context = None ):
+
+    if( context is None ):
+        context = get_context( n )
+
+    window_size = window_size_for( e.bit_length() )
+    windows, final_squarings = recode_exponent( e, window_size )
+
+    for message in messages:
+
+        if( message < 0 or message >= n ):
+            print( "ERROR: You message doesn't follow 0 <= message < n. Try padding your message" )
+            yield None
+            continue
+
+        yield context.mod_exp_recoded( message, window_size, windows, final_squarings )
+
+#------------------------------------------
+# decrypt_many
+#------------------------------------------
+# Decrypts a stream of ciphertexts under one private
+# key, yielding each message in turn
+
+def decrypt_many( ciphertexts, d, n, context = None ):
+
+    if( context is None ):
+        context = get_context( n )
+
+    window_size = window_size_for( d.bit_length() )
+    windows, final_squarings = recode_exponent( d, window_size )
+
+    for ciphertext in ciphertexts:
+        yield context.mod_exp_recoded( ciphertext, window_size, windows, final_squarings )
+
+#------------------------------------------
+# decrypt_crt
+#------------------------------------------
+# Decrypt a message using our private key, with the
+# Chinese Remainder Theorem
+#
+# This performs two half-size exponentiations (mod p
+# and mod q) and recombines them with Garner's formula,
+# rather than one full-size exponentiation mod n
+
+def decrypt_crt( ciphertext, p, q, dP, dQ, qInv ):
+    m1 = mod_exp( ciphertext, dP, p )
+    m2 = mod_exp( ciphertext, dQ, q )
+
+    # Garner recombination: m = m2 + q * ( qInv * ( m1 - m2 ) mod p )
+    h = ( qInv * ( m1 - m2 ) ) % p
+
+    message = m2 + ( h * q )
+    return message
@@ -3,44 +3,38 @@
 #==========================================================
 # A public-private key pair generator for RSA
 
-from math import sqrt
-from random import randint, seed
-# seed( 0xdeadbeef ) # Reproducible
-
-#------------------------------------------
-# isPrime
-#------------------------------------------
-# Determines if a number is prime or not
-
-def isPrime( n ):
-
-    # Check all numbers below to see if it's divisible
-    for i in range( 2, ( int( sqrt( n ) ) + 1 ) ):
-        if( n % i == 0 ):
-            return False
-
-    # Otherwise, it's prime
-    return True
+from keygen_common import randomPrime, modinv, choosePublicExponent
 
 #------------------------------------------
 # gen_keys
 #------------------------------------------
-# Generates RSA keys
-
-def gen_keys():
-
-    # First, find two prime distinct prime numbers p and q
-
-    p = randint( 2, 0xffff )
-    q = randint( 2, 0xffff )
-
-    while( not isPrime( p ) ):
-        # Increment p until we find a prime
-        p += 1
-
-    while( ( not isPrime( q ) ) or ( p == q ) ):
-        # Increment q until we find a distinct prime
-        q += 1
+# Generates RSA keys, with a modulus of the given
+# size (in bits)
+#
+# The cost is almost all in finding the primes: each
+# sieved candidate costs a pow() at half the modulus
+# size, and a prime of k bits takes around k / 20 such
+# candidates. Only two Miller-Rabin rounds are run on
+# primes of 1300 bits or more, and most composites fail
+# the first, so fewer rounds wouldn't help. In CPython,
+# expect around 0.1 s for a 1024-bit modulus, 0.5 s for
+# 2048 bits and 5-15 s for 4096 bits; keep large keys in
+# a KeyStore (algo/keystore.py) rather than generating
+# them on every run
+
+def gen_keys( bits = 32 ):
+
+    # First, find two prime distinct prime numbers p and q, each with
+    # half of the bits of the modulus
+
+    assert bits >= 16
+
+    p = randomPrime( bits // 2 )
+    q = randomPrime( bits - ( bits // 2 ) )
+
+    while( p == q ):
+        # Find a distinct prime
+        q = randomPrime( bits - ( bits // 2 ) )
 
     # Next, we generate the product of these two, n
 
@@ -50,38 +44,21 @@ def gen_keys():
 
     totient = ( p - 1 ) * ( q - 1 )
 
-    # Next, we choose a value for e - the most common is 65537, which we will use for now
-
-    e = 65537
-
-    while( e >= totient or ( not isPrime( e ) ) or ( totient % e == 0 ) ):
-        e -= 1
-
-    # Lastly, we determine d via the extended Euclidean algorithm, with e and the totient as our two inputs
-
-    #       new   old
-    r = [ totient, e ]
-    s = [       1, 0 ]
-    t = [       0, 1 ]
-
-    while( r[0] != 0 ):
+    # Next, we choose a value for e - the most common is 65537
 
-        # Update values according to RSA
+    e = choosePublicExponent( totient )
 
-        quotient = int( r[1]/r[0] )
+    # Lastly, we determine d as the inverse of e modulo the totient
 
-        r = [ r[1] - ( quotient * r[0] ), r[0] ]
-        s = [ s[1] - ( quotient * s[0] ), s[0] ]
-        t = [ t[1] - ( quotient * t[0] ), t[0] ]
+    d = modinv( e, totient )
 
-    # d is the coefficient obtained for e
-    d = t[1]
+    # We also keep the parameters for decrypting with the Chinese
+    # Remainder Theorem: d reduced modulo p - 1 and q - 1, and the
+    # inverse of q modulo p
 
-    # Correct for negative sign
-    if( d < 0 ):
-        t[1] += totient
-        s[1] -= e
-        d = t[1]
+    dP   = d % ( p - 1 )
+    dQ   = d % ( q - 1 )
+    qInv = modinv( q, p )
 
     # Finally, return the keys
 
@@ -91,8 +68,13 @@ def gen_keys():
     }
 
     private_key = {
-        "d": d,
-        "n": n
+        "d":    d,
+        "n":    n,
+        "p":    p,
+        "q":    q,
+        "dP":   dP,
+        "dQ":   dQ,
+        "qInv": qInv
     }
 
     return {
@@ -3,7 +3,13 @@
 #==========================================================
 # Demo code for decrypting messages
 
-from rsa_crypt import decrypt
+import os
+import sys
+
+# rsa_crypt imports exp_common from algo/
+sys.path.insert( 0, os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), ".." ) )
+
+from rsa_crypt import decrypt_many
 
 # Get Input
 
@@ -24,8 +30,7 @@ data = [ int( datum.strip() ) for datum in data.split( "|" ) ]
 message_char_nums = []
 message_chars     = []
 
-for datum in data:
-    result = decrypt( datum, d, n )
+for result in decrypt_many( data, d, n ):
     message_char_nums.append( result )
     message_chars.append( chr( result ) )
 
@@ -0,0 +1,51 @@
+#==========================================================
+# radix_demo.py
+#==========================================================
+# Demo code comparing radix-2^k Montgomery multipliers,
+# reporting the number of steps each takes for the same
+# modular exponentiation
+
+import os
+import sys
+import time
+
+# rsa_crypt imports exp_common from algo/
+sys.path.insert( 0, os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), ".." ) )
+
+from random    import getrandbits, randint
+from rsa_crypt import MontMultiplierRadix, mod_exp
+
+# Get Input
+
+print( "Modular exponentiation (leave blank for random values)" )
+n = input( " n? (odd, 32-bit) : " )
+e = input( " e?               : " )
+b = input( " b?               : " )
+
+n = int( n ) if n else ( getrandbits( 32 ) | ( 1 << 31 ) | 1 )
+e = int( e ) if e else getrandbits( 32 )
+b = int( b ) if b else randint( 0, n - 1 )
+
+# Reference result, from the bit-serial model
+
+reference = mod_exp( b, e, n )
+
+print( "" )
+print( "n = {}, e = {}, b = {}".format( n, e, b ) )
+print( "Result: {}".format( reference ) )
+print( "" )
+print( "Radix  Bits/step  Steps/mul  Total steps  Time (ms)" )
+
+for radix_bits in [ 1, 2, 4, 8, 16, 32 ]:
+
+    MontMult = MontMultiplierRadix( n, ( 1 << 32 ), radix_bits )
+
+    start  = time.perf_counter()
+    result = mod_exp( b, e, n, MontMult )
+    elapsed = time.perf_counter() - start
+
+    assert result == reference, "Radix-{} result disagrees!".format( 1 << radix_bits )
+
+    print( "{:>5}  {:>9}  {:>9}  {:>11}  {:>9.3f}".format(
+        "2^{}".format( radix_bits ), radix_bits, MontMult.num_steps,
+        MontMult.steps, elapsed * 1e3 ) )
@@ -5,6 +5,8 @@
 
 import math
 
+from exp_common import MulStats, window_size_for, recode_exponent
+
 #------------------------------------------
 # MontMultiplier
 #------------------------------------------
@@ -102,13 +104,87 @@ class MontMultiplier:
         return string_repr
 
 
+#------------------------------------------
+# MontMultiplierRadix
+#------------------------------------------
+# A word-serial (radix-2^k) variant of the bit-serial
+# MontMultiplier, processing radix_bits bits of a per
+# step rather than one
+#
+# This models the trade-off of widening each AddRed
+# step in AddReds.v (fewer steps, each with a k-bit by
+# 32-bit multiply) before changing p_nsteps in hardware
+
+class MontMultiplierRadix( MontMultiplier ):
+
+    def __init__( self, mod, R, radix_bits = 1 ):
+        '''
+        Here, R is the key parameter from montgomery multiplication, mod is
+        the modulus we perform multiplication under, and radix_bits is the
+        number of bits of a processed per step (which must divide 32)
+        '''
+
+        super().__init__( mod, R )
+
+        assert ( radix_bits > 0 ) and ( 32 % radix_bits == 0 )
+
+        self.radix_bits = radix_bits
+        self.radix_mask = ( 1 << radix_bits ) - 1
+        self.num_steps  = 32 // radix_bits
+
+        # Pre-compute N' = -N^{-1} (mod 2^radix_bits), so that each step
+        # can pick the multiple of N that clears its low radix_bits bits.
+        # Each Newton iteration doubles the number of correct low bits of
+        # N^{-1}. For radix 2, N' is 1, matching the bit-serial model
+
+        inverse = 1
+        for i in range( radix_bits.bit_length() ):
+            inverse = ( inverse * ( 2 - ( mod * inverse ) ) ) & self.radix_mask
+
+        self.N_reciprocal = ( -inverse ) & self.radix_mask
+
+        # Total steps performed, for comparing radices
+        self.steps = 0
+
+    def multiply( self, a, b ):
+        '''
+        Performs an instance of Montgomery multiplication
+
+        Assumes that a and b are in N-residue form, and computes the output
+        in the same form
+        '''
+
+        result = 0
+
+        for i in range( self.num_steps ):
+            temp = result + ( ( a & self.radix_mask ) * b )
+
+            q = ( ( temp & self.radix_mask ) * self.N_reciprocal ) & self.radix_mask
+            temp = temp + ( q * self.mod )
+
+            result = temp >> self.radix_bits
+
+            a = a >> self.radix_bits
+
+        self.steps += self.num_steps
+
+        if( result > self.mod ):
+            result = result - self.mod
+
+        return result
+
+# Squarings and multiplies counted by this module's
+# exponentiation functions
+
+mul_stats = MulStats()
+
 #------------------------------------------
 # mod_exp
 #------------------------------------------
 # Computes ( base ** exponent ) % modulus
 # using modular exponentiation
 
-def mod_exp( base, exponent, modulus ):
+def mod_exp( base, exponent, modulus, MontMult = None ):
 
     # Adapted from Schneier, Bruce (1996). Applied Cryptography: Protocols, Algorithms, and Source Code in C, Second Edition (2nd ed.)
     # Using Montgomery multiplication
@@ -116,9 +192,10 @@ def mod_exp( base, exponent, modulus ):
     result = 1
     base = base % modulus
 
-    # Set up Montgomery multiplier
+    # Set up Montgomery multiplier, unless one for this modulus is given
 
-    MontMult = MontMultiplier( modulus, ( 1 << 32 ) )
+    if( MontMult is None ):
+        MontMult = MontMultiplier( modulus, ( 1 << 32 ) )
     
     result = MontMult.convert_in( result )
     base   = MontMult.convert_in( base )
@@ -127,15 +204,95 @@ def mod_exp( base, exponent, modulus ):
 
         if( ( exponent % 2 ) == 1 ):
             result = MontMult.multiply( result, base )
+            mul_stats.multiplies += 1
         
         exponent = exponent >> 1
         base = MontMult.multiply( base, base )
+        mul_stats.squarings += 1
 
     # Convert out of N-residue format
     result = MontMult.convert_out( result )
     
     return result
 
+#------------------------------------------
+# mod_exp_window
+#------------------------------------------
+# Computes ( base ** exponent ) % modulus
+# using sliding window exponentiation, which
+# uses a table of odd powers of the base to
+# process several exponent bits per multiply
+#
+# If not given, the window size is chosen from
+# the length of the exponent
+
+def mod_exp_window( base, exponent, modulus, window_size = None ):
+
+    if( window_size is None ):
+        window_size = window_size_for( exponent.bit_length() )
+
+    windows, final_squarings = recode_exponent( exponent, window_size )
+
+    # Set up Montgomery multiplier
+
+    MontMult = MontMultiplier( modulus, ( 1 << 32 ) )
+
+    return mod_exp_recoded( base, MontMult, window_size, windows, final_squarings )
+
+#------------------------------------------
+# mod_exp_recoded
+#------------------------------------------
+# Performs sliding window exponentiation with an
+# exponent that has already been split into windows
+# by recode_exponent, under the modulus of MontMult,
+# so that the recoding and multiplier can be shared
+# across many bases
+
+def mod_exp_recoded( base, MontMult, window_size, windows, final_squarings ):
+
+    base = base % MontMult.mod
+    base = MontMult.convert_in( base )
+
+    # Pre-compute the odd powers base^1, base^3, ..., base^( 2^w - 1 ),
+    # all in N-residue format
+
+    table = [ base ]
+
+    if( window_size > 1 ):
+        base_squared = MontMult.multiply( base, base )
+        mul_stats.squarings += 1
+
+        for i in range( ( 1 << ( window_size - 1 ) ) - 1 ):
+            table.append( MontMult.multiply( table[-1], base_squared ) )
+            mul_stats.multiplies += 1
+
+    # The first window is taken directly from the table, rather than
+    # squaring and multiplying into 1
+
+    result = MontMult.convert_in( 1 )
+
+    for idx, ( squarings, value ) in enumerate( windows ):
+
+        if( idx == 0 ):
+            result = table[ value >> 1 ]
+            continue
+
+        for i in range( squarings ):
+            result = MontMult.multiply( result, result )
+        mul_stats.squarings += squarings
+
+        result = MontMult.multiply( result, table[ value >> 1 ] )
+        mul_stats.multiplies += 1
+
+    for i in range( final_squarings ):
+        result = MontMult.multiply( result, result )
+    mul_stats.squarings += final_squarings
+
+    # Convert out of N-residue format
+    result = MontMult.convert_out( result )
+
+    return result
+
 
 #------------------------------------------
 # encrypt
@@ -160,3 +317,65 @@ def decrypt( ciphertext, d, n ):
     message = mod_exp( ciphertext, d, n )
     return message
 
+#------------------------------------------
+# encrypt_many
+#------------------------------------------
+# Encrypts a stream of messages (any iterable of
+# integers, such as a list or a buffer) under one
+# public key, yielding each ciphertext in turn
+#
+# One Montgomery multiplier is set up for the whole
+# stream, as the accelerator would keep it for a key,
+# and the exponent is recoded once
+
+def encrypt_many( messages, e, n ):
+
+    MontMult = MontMultiplier( n, ( 1 << 32 ) )
+
+    window_size = window_size_for( e.bit_length() )
+    windows, final_squarings = recode_exponent( e, window_size )
+
+    for message in messages:
+
+        if( message < 0 or message >= n ):
+            print( "ERROR: You message doesn't follow 0 <= message < n. Try padding your message" )
+            yield None
+            continue
+
+        yield mod_exp_recoded( message, MontMult, window_size, windows, final_squarings )
+
+#------------------------------------------
+# decrypt_many
+#------------------------------------------
+# Decrypts a stream of ciphertexts under one private
+# key, yielding each message in turn
+
+def decrypt_many( ciphertexts, d, n ):
+
+    MontMult = MontMultiplier( n, ( 1 << 32 ) )
+
+    window_size = window_size_for( d.bit_length() )
+    windows, final_squarings = recode_exponent( d, window_size )
+
+    for ciphertext in ciphertexts:
+        yield mod_exp_recoded( ciphertext, MontMult, window_size, windows, final_squarings )
+
+#------------------------------------------
+# decrypt_crt
+#------------------------------------------
+# Decrypt a message using our private key, with the
+# Chinese Remainder Theorem
+#
+# This performs two half-size exponentiations (mod p
+# and mod q) and recombines them with Garner's formula,
+# rather than one full-size exponentiation mod n
+
+def decrypt_crt( ciphertext, p, q, dP, dQ, qInv ):
+    m1 = mod_exp( ciphertext, dP, p )
+    m2 = mod_exp( ciphertext, dQ, q )
+
+    # Garner recombination: m = m2 + q * ( qInv * ( m1 - m2 ) mod p )
+    h = ( qInv * ( m1 - m2 ) ) % p
+
+    message = m2 + ( h * q )
+    return message
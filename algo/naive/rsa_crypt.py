@@ -3,6 +3,13 @@
 #==========================================================
 # Functions for encrypting and decrypting RSA messages
 
+from exp_common import MulStats, window_size_for, recode_exponent
+
+# Squarings and multiplies counted by this module's
+# exponentiation functions
+
+mul_stats = MulStats()
+
 #------------------------------------------
 # mod_exp
 #------------------------------------------
@@ -20,9 +27,79 @@ def mod_exp( base, exponent, modulus ):
 
         if( ( exponent % 2 ) == 1 ):
             result = ( result * base ) % modulus
+            mul_stats.multiplies += 1
         
         exponent = exponent >> 1
         base = ( base * base ) % modulus
+        mul_stats.squarings += 1
+
+    return result
+
+#------------------------------------------
+# mod_exp_window
+#------------------------------------------
+# Computes ( base ** exponent ) % modulus
+# using sliding window exponentiation, which
+# uses a table of odd powers of the base to
+# process several exponent bits per multiply
+#
+# If not given, the window size is chosen from
+# the length of the exponent
+
+def mod_exp_window( base, exponent, modulus, window_size = None ):
+
+    if( window_size is None ):
+        window_size = window_size_for( exponent.bit_length() )
+
+    windows, final_squarings = recode_exponent( exponent, window_size )
+
+    return mod_exp_recoded( base, modulus, window_size, windows, final_squarings )
+
+#------------------------------------------
+# mod_exp_recoded
+#------------------------------------------
+# Performs sliding window exponentiation with an
+# exponent that has already been split into windows
+# by recode_exponent, so that the recoding can be
+# shared across many bases
+
+def mod_exp_recoded( base, modulus, window_size, windows, final_squarings ):
+
+    base = base % modulus
+
+    # Pre-compute the odd powers base^1, base^3, ..., base^( 2^w - 1 )
+
+    table = [ base ]
+
+    if( window_size > 1 ):
+        base_squared = ( base * base ) % modulus
+        mul_stats.squarings += 1
+
+        for i in range( ( 1 << ( window_size - 1 ) ) - 1 ):
+            table.append( ( table[-1] * base_squared ) % modulus )
+            mul_stats.multiplies += 1
+
+    # The first window is taken directly from the table, rather than
+    # squaring and multiplying into 1
+
+    result = 1 % modulus
+
+    for idx, ( squarings, value ) in enumerate( windows ):
+
+        if( idx == 0 ):
+            result = table[ value >> 1 ]
+            continue
+
+        for i in range( squarings ):
+            result = ( result * result ) % modulus
+        mul_stats.squarings += squarings
+
+        result = ( result * table[ value >> 1 ] ) % modulus
+        mul_stats.multiplies += 1
+
+    for i in range( final_squarings ):
+        result = ( result * result ) % modulus
+    mul_stats.squarings += final_squarings
 
     return result
 
@@ -50,3 +127,59 @@ def decrypt( ciphertext, d, n ):
     message = mod_exp( ciphertext, d, n )
     return message
 
+#------------------------------------------
+# encrypt_many
+#------------------------------------------
+# Encrypts a stream of messages (any iterable of
+# integers, such as a list or a buffer) under one
+# public key, yielding each ciphertext in turn
+#
+# The exponent is recoded once for the whole stream
+
+def encrypt_many( messages, e, n ):
+
+    window_size = window_size_for( e.bit_length() )
+    windows, final_squarings = recode_exponent( e, window_size )
+
+    for message in messages:
+
+        if( message < 0 or message >= n ):
+            print( "ERROR: You message doesn't follow 0 <= message < n. Try padding your message" )
+            yield None
+            continue
+
+        yield mod_exp_recoded( message, n, window_size, windows, final_squarings )
+
+#------------------------------------------
+# decrypt_many
+#------------------------------------------
+# Decrypts a stream of ciphertexts under one private
+# key, yielding each message in turn
+
+def decrypt_many( ciphertexts, d, n ):
+
+    window_size = window_size_for( d.bit_length() )
+    windows, final_squarings = recode_exponent( d, window_size )
+
+    for ciphertext in ciphertexts:
+        yield mod_exp_recoded( ciphertext, n, window_size, windows, final_squarings )
+
+#------------------------------------------
+# decrypt_crt
+#------------------------------------------
+# Decrypt a message using our private key, with the
+# Chinese Remainder Theorem
+#
+# This performs two half-size exponentiations (mod p
+# and mod q) and recombines them with Garner's formula,
+# rather than one full-size exponentiation mod n
+
+def decrypt_crt( ciphertext, p, q, dP, dQ, qInv ):
+    m1 = mod_exp( ciphertext, dP, p )
+    m2 = mod_exp( ciphertext, dQ, q )
+
+    # Garner recombination: m = m2 + q * ( qInv * ( m1 - m2 ) mod p )
+    h = ( qInv * ( m1 - m2 ) ) % p
+
+    message = m2 + ( h * q )
+    return message
@@ -0,0 +1,170 @@
+#==========================================================
+# parallel.py
+#==========================================================
+# A process-pool executor for running many independent
+# modular exponentiations across cores
+#
+# Keys are shipped to each worker process once, when the
+# pool starts; tasks only carry a key index and a shard of
+# values. Run from the algo directory, like test.py:
+#
+#   from parallel import ParallelExecutor
+#
+#   with ParallelExecutor( [ ( e, n ), ( d, n ) ], "montgomery" ) as pool:
+#       ciphertexts = list( pool.map( 0, messages ) )
+
+import importlib
+import os
+
+from collections        import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+#------------------------------------------
+# Worker state
+#------------------------------------------
+# Set up once per worker process by init_worker
+
+worker_engine = None
+worker_keys   = None
+
+def init_worker( engine_name, keys ):
+    '''
+    Imports the engine's rsa_crypt module and stores the keys in the
+    worker process. For Montgomery engines, the per-key contexts are
+    also built here, so that setup is paid once per worker
+    '''
+
+    global worker_engine, worker_keys
+
+    worker_engine = importlib.import_module( engine_name + ".rsa_crypt" )
+    worker_keys   = keys
+
+    if( hasattr( worker_engine, "get_context" ) ):
+        for exponent, modulus in keys:
+            worker_engine.get_context( modulus )
+
+def run_shard( key_id, shard ):
+    '''
+    Exponentiates every value in the shard under the given key
+    '''
+
+    exponent, modulus = worker_keys[ key_id ]
+
+    # decrypt_many exponentiates without checking the range of its
+    # inputs, so it serves for both encryption and decryption here
+    return list( worker_engine.decrypt_many( shard, exponent, modulus ) )
+
+#------------------------------------------
+# ParallelExecutor
+#------------------------------------------
+# Shards batches of exponentiations across a pool of
+# worker processes
+
+class ParallelExecutor:
+
+    def __init__( self, keys, engine = "montgomery", max_workers = None,
+                  shard_size = 64 ):
+        '''
+        keys is a list of ( exponent, modulus ) pairs, referred to by index
+        in map. engine names the algo package to use (naive, montgomery or
+        montgomery_hardware), and shard_size is the number of values sent
+        to a worker per task
+        '''
+
+        assert shard_size > 0
+
+        self.keys       = list( keys )
+        self.engine     = engine
+        self.shard_size = shard_size
+
+        if( max_workers is None ):
+            max_workers = os.cpu_count() or 1
+
+        self.max_workers = max_workers
+
+        self.pool = ProcessPoolExecutor(
+            max_workers = max_workers,
+            initializer = init_worker,
+            initargs    = ( engine, self.keys ) )
+
+        # Bound the number of shards in flight, so that memory use stays
+        # flat for large inputs
+        self.max_in_flight = 4 * max_workers
+
+    def shards( self, values ):
+        '''
+        Splits an iterable of values into lists of at most shard_size
+        '''
+
+        shard = []
+        for value in values:
+            shard.append( value )
+            if( len( shard ) == self.shard_size ):
+                yield shard
+                shard = []
+
+        if( len( shard ) > 0 ):
+            yield shard
+
+    def map( self, key_id, values, ordered = True ):
+        '''
+        Exponentiates every value under keys[key_id]
+
+        If ordered, yields the results in the same order as values.
+        Otherwise, yields ( index, result ) pairs as shards complete
+        '''
+
+        assert 0 <= key_id < len( self.keys )
+
+        if( ordered ):
+            return self.map_ordered( key_id, values )
+        else:
+            return self.map_as_completed( key_id, values )
+
+    def map_ordered( self, key_id, values ):
+        '''
+        Yields results in order, waiting on the oldest shard in flight
+        '''
+
+        in_flight = deque()
+
+        for shard in self.shards( values ):
+            in_flight.append( self.pool.submit( run_shard, key_id, shard ) )
+
+            if( len( in_flight ) >= self.max_in_flight ):
+                yield from in_flight.popleft().result()
+
+        while( len( in_flight ) > 0 ):
+            yield from in_flight.popleft().result()
+
+    def map_as_completed( self, key_id, values ):
+        '''
+        Yields ( index, result ) pairs from whichever shards finish first
+        '''
+
+        in_flight = {}
+        start     = 0
+
+        for shard in self.shards( values ):
+            future = self.pool.submit( run_shard, key_id, shard )
+            in_flight[ future ] = start
+            start += len( shard )
+
+            if( len( in_flight ) >= self.max_in_flight ):
+                done, not_done = wait( in_flight, return_when = FIRST_COMPLETED )
+                for future in done:
+                    yield from enumerate( future.result(), in_flight.pop( future ) )
+
+        while( len( in_flight ) > 0 ):
+            done, not_done = wait( in_flight, return_when = FIRST_COMPLETED )
+            for future in done:
+                yield from enumerate( future.result(), in_flight.pop( future ) )
+
+    def shutdown( self ):
+        self.pool.shutdown()
+
+    def __enter__( self ):
+        return self
+
+    def __exit__( self, exc_type, exc_value, traceback ):
+        self.shutdown()
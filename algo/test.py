@@ -5,33 +5,58 @@
 # our reference
 
 from rsa.core import encrypt_int, decrypt_int
-from rsa      import newkeys
 
 from naive.rsa_crypt      import encrypt as encrypt_naive
 from naive.rsa_crypt      import decrypt as decrypt_naive
+from naive.rsa_crypt      import decrypt_crt as decrypt_crt_naive
+from naive.rsa_crypt      import mod_exp_window as mod_exp_window_naive
+from naive.rsa_crypt      import encrypt_many as encrypt_many_naive
+from naive.rsa_crypt      import decrypt_many as decrypt_many_naive
 
 from montgomery.rsa_crypt import encrypt as encrypt_mont
 from montgomery.rsa_crypt import decrypt as decrypt_mont
+from montgomery.rsa_crypt import decrypt_crt as decrypt_crt_mont
+from montgomery.rsa_crypt import FixedBase, FixedBaseCache, get_context
+from montgomery.rsa_crypt import mod_exp_fixed_base
+from montgomery.rsa_crypt import MULTI_EXP_GROUP
+from montgomery.rsa_crypt import MontMultiplierCIOS, MontContext
+from montgomery.rsa_crypt import mod_exp as mod_exp_mont
+from montgomery.rsa_crypt import mod_exp_window as mod_exp_window_mont
+from montgomery.rsa_crypt import encrypt_many as encrypt_many_mont
+from montgomery.rsa_crypt import decrypt_many as decrypt_many_mont
+from montgomery.rsa_crypt import mod_exp_ladder, decrypt_ladder
 from montgomery_hardware.rsa_crypt import encrypt as encrypt_hard
 from montgomery_hardware.rsa_crypt import decrypt as decrypt_hard
+from montgomery_hardware.rsa_crypt import decrypt_crt as decrypt_crt_hard
+from montgomery_hardware.rsa_crypt import mod_exp_window as mod_exp_window_hard
+from montgomery_hardware.rsa_crypt import encrypt_many as encrypt_many_hard
+from montgomery_hardware.rsa_crypt import decrypt_many as decrypt_many_hard
+
+from exp_common import window_size_for
+
+from keygen_common import isPrime, isProbablePrime, sieveCandidates, randomPrime
+from keygen_common import SMALL_PRIMES
+
+from keystore import KeyStore
+from key_pool import KeyPool
+from parallel import ParallelExecutor
+
+import time
 
 from random import randint, seed
 seed( 0xdeadbeef )
 
-def gen_keys( size ):
+def load_keys( count, size ):
     '''
-    Generates RSA keys of a given size
+    Loads RSA keys of a given size from the on-disk key
+    store, only generating the ones that are missing
     '''
 
-    keys = newkeys(32)
-    pub_key = keys[0]
-    priv_key = keys[1]
+    key_store = KeyStore( bits = size, seed = 0xdeadbeef )
 
-    n = pub_key.n
-    e = pub_key.e
-    d = priv_key.d
-
-    return n, e, d
+    # CRT parameters: p, q, dP, dQ, qInv
+    return [ ( n, e, d, ( p, q, dP, dQ, qInv ) )
+             for n, e, d, p, q, dP, dQ, qInv in key_store.keys( count ) ]
 
 def test_encrypt( message, e, n ):
     '''
@@ -87,12 +112,501 @@ def test_decrypt( ciphertext, d, n ):
     # Otherwise, they all agree
     return ref
 
+def test_decrypt_crt( ciphertext, d, n, crt ):
+    '''
+    Tests that all implementations decrypt a message the
+    same way using the Chinese Remainder Theorem, and
+    returns that message
+    '''
+
+    ref   = decrypt_int      ( ciphertext, d, n )
+    naive = decrypt_crt_naive( ciphertext, *crt )
+    mont  = decrypt_crt_mont ( ciphertext, *crt )
+    hard  = decrypt_crt_hard ( ciphertext, *crt )
+
+    if( ( ref != naive ) or ( ref != mont ) or ( ref != hard ) ): # We don't agree
+        print( "ERROR: CRT decryption doesn't agree!" )
+
+        print( "Ciphertext: {}".format( ciphertext ) )
+        print( "n:          {}".format( n )          )
+        print( "d:          {}".format( d )          )
+        print( "p, q:       {}, {}".format( crt[0], crt[1] ) )
+
+        print( "Reference:  {}".format( ref )   )
+        print( "Naive:      {}".format( naive ) )
+        print( "Montgomery: {}".format( mont )  )
+        print( "Hardware:   {}".format( hard )  )
+
+        assert False
+
+    # Otherwise, they all agree
+    return ref
+
+def test_is_prime():
+    '''
+    Tests the primality test on known primes, Carmichael
+    numbers and strong pseudoprimes, covering the small
+    prime screen, the deterministic witness sets and the
+    random witnesses used for large numbers
+    '''
+
+    primes = [ 2, 3, 5, 2039, 2053, 65537, 2147483647,
+               ( 1 << 61 ) - 1, ( 1 << 89 ) - 1, ( 1 << 127 ) - 1,
+               ( 1 << 521 ) - 1, ( 1 << 607 ) - 1 ]
+
+    composites = [ 0, 1, 4, 2047, 2048 * 2049 + 1, ( 1 << 67 ) - 1,
+                   ( ( 1 << 61 ) - 1 ) * ( ( 1 << 89 ) - 1 ) ]
+
+    # Carmichael numbers, where every coprime base is a Fermat liar.
+    # The last two have no factor below 2048, so reach Miller-Rabin:
+    # ( 6k + 1 )( 12k + 1 )( 18k + 1 ) for k = 370 and k = 100000131
+
+    carmichaels = [ 561, 1105, 1729, 2465, 2821, 6601, 8911, 41041,
+                    825265, 321197185, 2221 * 4441 * 6661,
+                    600000787 * 1200001573 * 1800002359 ]
+
+    # Strong pseudoprimes to bases 2, 3, 5 and 7 (below the next
+    # deterministic bound), and to base 2 alone
+
+    pseudoprimes = [ 3215031751, 2047, 3277, 4033, 4681 ]
+
+    for n in primes + composites + carmichaels + pseudoprimes:
+
+        expected = n in primes
+        if( isPrime( n ) != expected ):
+            print( "ERROR: isPrime is wrong!" )
+
+            print( "n:          {}".format( n )        )
+            print( "Expected:   {}".format( expected ) )
+
+            assert False
+
+    # Screened candidates skip isPrime's trial division, so test the
+    # Miller-Rabin stage on its own too
+
+    for n in carmichaels[-2:] + pseudoprimes[:1]:
+        if( isProbablePrime( n ) ):
+            print( "ERROR: {} passed Miller-Rabin!".format( n ) )
+            assert False
+
+def test_sieve_candidates( bits, count ):
+    '''
+    Tests that the first count candidates from the sieve
+    have exactly bits bits with the top two set, and have
+    no small factors. Also tests randomPrime at that size
+    '''
+
+    primes = [ p for p in SMALL_PRIMES if p < ( 1 << ( bits - 1 ) ) ]
+
+    candidates = sieveCandidates( bits )
+
+    for i in range( count ):
+
+        candidate = next( candidates )
+
+        if( ( candidate.bit_length() != bits ) or
+            ( ( candidate >> ( bits - 2 ) ) != 0b11 ) or
+            any( ( candidate % p ) == 0 for p in primes ) ): # Should have been rejected
+            print( "ERROR: Sieve gave a bad {}-bit candidate!".format( bits ) )
+
+            print( "Candidate:  {}".format( candidate ) )
+
+            assert False
+
+        # Below 2^22, the small primes cover every possible factor
+
+        if( ( bits <= 22 ) and not isPrime( candidate ) ):
+            print( "ERROR: Sieve gave a composite {}-bit candidate: {}".format( bits, candidate ) )
+            assert False
+
+    prime = randomPrime( bits )
+
+    if( ( prime.bit_length() != bits ) or not isPrime( prime ) ):
+        print( "ERROR: randomPrime gave a bad {}-bit prime: {}".format( bits, prime ) )
+        assert False
+
+def test_key_pool( bits, size, num_workers ):
+    '''
+    Tests that a KeyPool fills up, hands out valid keys
+    (refilling when drained past its size), and keeps its
+    counters consistent
+    '''
+
+    def wait_for_depth( pool, depth ):
+        deadline = time.perf_counter() + 60.0
+        while( pool.depth() < depth ):
+            if( time.perf_counter() > deadline ):
+                print( "ERROR: Key pool didn't refill: {}".format( pool.stats() ) )
+                assert False
+            time.sleep( 0.01 )
+
+    with KeyPool( bits, size, num_workers ) as pool:
+
+        wait_for_depth( pool, size )
+
+        # Take more keys than the pool holds, so it has to refill
+
+        for i in range( 3 * size ):
+
+            keys = pool.get_key( timeout = 60.0 )
+            n = keys["public key"]["n"]
+            e = keys["public key"]["e"]
+            d = keys["private key"]["d"]
+
+            message = randint( 0, n - 1 )
+
+            if( ( n.bit_length() != bits ) or ( pow( pow( message, e, n ), d, n ) != message ) ):
+                print( "ERROR: Key pool gave a bad key!" )
+
+                print( "Keys:       {}".format( keys ) )
+
+                assert False
+
+        wait_for_depth( pool, size )
+
+        stats = pool.stats()
+
+        if( ( stats["taken"] != 3 * size ) or ( stats["size"] != size ) or
+            ( stats["generated"] < 4 * size ) or ( stats["depth"] < size ) or
+            ( sum( stats["histogram"].values() ) < stats["generated"] ) or
+            ( stats["refill rate"] <= 0 ) ): # Counters don't add up
+            print( "ERROR: Key pool stats are wrong!" )
+
+            print( "Size:       {}".format( size )  )
+            print( "Stats:      {}".format( stats ) )
+
+            assert False
+
+def test_batch( messages, e, d, n ):
+    '''
+    Tests that every implementation's encrypt_many and
+    decrypt_many match encrypting and decrypting each
+    message on its own, and give the messages back
+    '''
+
+    implementations = [
+        ( "Naive",      encrypt_naive, decrypt_naive, encrypt_many_naive, decrypt_many_naive ),
+        ( "Montgomery", encrypt_mont,  decrypt_mont,  encrypt_many_mont,  decrypt_many_mont  ),
+        ( "Hardware",   encrypt_hard,  decrypt_hard,  encrypt_many_hard,  decrypt_many_hard  ),
+    ]
+
+    for name, encrypt, decrypt, encrypt_many, decrypt_many in implementations:
+
+        ciphertexts = [ encrypt( message, e, n ) for message in messages ]
+
+        # The batch functions take any iterable, so pass generators
+
+        batch_ciphertexts = list( encrypt_many( ( m for m in messages ), e, n ) )
+        batch_messages    = list( decrypt_many( ( c for c in batch_ciphertexts ), d, n ) )
+
+        single_messages = [ decrypt( ciphertext, d, n ) for ciphertext in ciphertexts ]
+
+        if( ( batch_ciphertexts != ciphertexts ) or ( batch_messages != single_messages ) or
+            ( batch_messages != list( messages ) ) ): # We don't agree
+            print( "ERROR: {} batch encryption doesn't agree!".format( name ) )
+
+            print( "n:          {}".format( n )        )
+            print( "e:          {}".format( e )        )
+            print( "d:          {}".format( d )        )
+            print( "Messages:   {}".format( messages ) )
+
+            print( "Single:     {}".format( ciphertexts )       )
+            print( "Batch:      {}".format( batch_ciphertexts ) )
+            print( "Decrypted:  {}".format( batch_messages )    )
+
+            assert False
+
+def test_parallel( engine, max_workers, e, d, n, messages ):
+    '''
+    Tests that a ParallelExecutor encrypts and decrypts in
+    input order, and that its unordered results cover
+    every input
+    '''
+
+    ciphertexts = [ pow( message, e, n ) for message in messages ]
+
+    # Small shards, so that even short inputs are split across tasks
+    # and fill the in-flight limit
+
+    with ParallelExecutor( [ ( e, n ), ( d, n ) ], engine, max_workers,
+                           shard_size = 3 ) as pool:
+
+        encrypted = list( pool.map( 0, messages ) )
+        decrypted = list( pool.map( 1, iter( encrypted ) ) )
+        unordered = list( pool.map( 0, messages, ordered = False ) )
+
+    if( ( encrypted != ciphertexts ) or ( decrypted != list( messages ) ) or
+        ( sorted( unordered ) != list( enumerate( ciphertexts ) ) ) ): # We don't agree
+        print( "ERROR: Parallel {} exponentiation doesn't agree!".format( engine ) )
+
+        print( "n:          {}".format( n )           )
+        print( "Workers:    {}".format( max_workers ) )
+        print( "Messages:   {}".format( messages )    )
+
+        print( "Reference:  {}".format( ciphertexts ) )
+        print( "Encrypted:  {}".format( encrypted )   )
+        print( "Decrypted:  {}".format( decrypted )   )
+        print( "Unordered:  {}".format( unordered )   )
+
+        assert False
+
+def test_mod_exp_window( base, exponent, n, window_size = None ):
+    '''
+    Tests that all implementations of sliding window
+    exponentiation agree with Python's pow
+    '''
+
+    ref   = pow( base, exponent, n )
+    naive = mod_exp_window_naive( base, exponent, n, window_size )
+    mont  = mod_exp_window_mont ( base, exponent, n, window_size )
+    hard  = mod_exp_window_hard ( base, exponent, n, window_size )
+
+    if( ( ref != naive ) or ( ref != mont ) or ( ref != hard ) ): # We don't agree
+        print( "ERROR: Sliding window exponentiation doesn't agree!" )
+
+        print( "Base:       {}".format( base )        )
+        print( "Exponent:   {}".format( exponent )    )
+        print( "n:          {}".format( n )           )
+        print( "Window:     {}".format( window_size ) )
+
+        print( "Reference:  {}".format( ref )   )
+        print( "Naive:      {}".format( naive ) )
+        print( "Montgomery: {}".format( mont )  )
+        print( "Hardware:   {}".format( hard )  )
+
+        assert False
+
+def test_window_size_for():
+    '''
+    Tests the window size chosen on either side of each
+    threshold in window_size_for
+    '''
+
+    expected = [ ( 1, 1 ), ( 23, 1 ), ( 24, 3 ), ( 79, 3 ), ( 80, 4 ),
+                 ( 239, 4 ), ( 240, 5 ), ( 671, 5 ), ( 672, 6 ), ( 4096, 6 ) ]
+
+    for exponent_bits, window_size in expected:
+        if( window_size_for( exponent_bits ) != window_size ):
+            print( "ERROR: Wrong window size for a {}-bit exponent!".format( exponent_bits ) )
+
+            print( "Expected:   {}".format( window_size ) )
+            print( "Got:        {}".format( window_size_for( exponent_bits ) ) )
+
+            assert False
+
+def test_ladder( base, exponent, n ):
+    '''
+    Tests Montgomery ladder exponentiation (with the
+    branchless multiplier) and decrypt_ladder against
+    Python's pow
+    '''
+
+    ref     = pow( base, exponent, n )
+    ladder  = mod_exp_ladder( base, exponent, n )
+    decrypt = decrypt_ladder( base, exponent, n )
+
+    # Extra leading zeros, as when padding to a fixed exponent length
+
+    context = get_context( n, branchless = True )
+    padded  = context.mod_exp_ladder( base, exponent, n.bit_length() + 64 )
+
+    if( ( ref != ladder ) or ( ref != decrypt ) or ( ref != padded ) ): # We don't agree
+        print( "ERROR: Ladder exponentiation doesn't agree!" )
+
+        print( "Base:       {}".format( base )     )
+        print( "Exponent:   {}".format( exponent ) )
+        print( "n:          {}".format( n )        )
+
+        print( "Reference:  {}".format( ref )     )
+        print( "Ladder:     {}".format( ladder )  )
+        print( "Decrypt:    {}".format( decrypt ) )
+        print( "Padded:     {}".format( padded )  )
+
+        assert False
+
+def test_mont_cios( n, word_bits ):
+    '''
+    Tests the CIOS Montgomery multiplier and a MontContext
+    under n, with words of word_bits, against Python's pow
+    '''
+
+    mont    = MontMultiplierCIOS( n, word_bits )
+    context = MontContext( n, word_bits )
+
+    R_inverse = pow( mont.R, -1, n )
+
+    # Products of values in N-residue form, including the extremes
+
+    operands = [ ( 0, 0 ), ( 1, 1 ), ( n - 1, n - 1 ), ( 0, n - 1 ),
+                 ( randint( 0, n - 1 ), randint( 0, n - 1 ) ) ]
+
+    for a, b in operands:
+
+        ref  = ( a * b * R_inverse ) % n
+        cios = mont.multiply( a, b )
+
+        if( ref != cios ): # We don't agree
+            print( "ERROR: CIOS multiplication doesn't agree!" )
+
+            print( "a, b:       {}, {}".format( a, b ) )
+            print( "n:          {}".format( n )         )
+            print( "word_bits:  {}".format( word_bits ) )
+
+            print( "Reference:  {}".format( ref )  )
+            print( "CIOS:       {}".format( cios ) )
+
+            assert False
+
+    # Full exponentiations, through the context and the module-level
+    # function
+
+    exponents = [ 0, 1, n - 1, randint( 0, n - 1 ) ]
+
+    for exponent in exponents:
+
+        base = randint( 0, n - 1 )
+
+        ref   = pow( base, exponent, n )
+        ctx   = context.mod_exp( base, exponent )
+        func  = mod_exp_mont( base, exponent, n, word_bits )
+
+        if( ( ref != ctx ) or ( ref != func ) ): # We don't agree
+            print( "ERROR: MontContext exponentiation doesn't agree!" )
+
+            print( "Base:       {}".format( base )      )
+            print( "Exponent:   {}".format( exponent )  )
+            print( "n:          {}".format( n )         )
+            print( "word_bits:  {}".format( word_bits ) )
+
+            print( "Reference:  {}".format( ref )  )
+            print( "Context:    {}".format( ctx )  )
+            print( "mod_exp:    {}".format( func ) )
+
+            assert False
+
+def test_fixed_base( base, n ):
+    '''
+    Tests fixed-base exponentiation of base under n against
+    Python's pow, for exponents of 0 and 1, ones within the
+    precomputed table and ones longer than it
+    '''
+
+    exponents = [ 0, 1, 2, randint( 0, n - 1 ), ( 1 << 64 ) - 1,
+                  randint( 0, ( 1 << ( 3 * n.bit_length() ) ) - 1 ) ]
+
+    # A table built for short exponents, which has to be extended
+
+    short = FixedBase( base, get_context( n ), exponent_bits = 8 )
+
+    for exponent in exponents:
+
+        ref    = pow( base, exponent, n )
+        table  = short.mod_exp( exponent )
+        cached = mod_exp_fixed_base( base, exponent, n )
+
+        if( ( ref != table ) or ( ref != cached ) ): # We don't agree
+            print( "ERROR: Fixed-base exponentiation doesn't agree!" )
+
+            print( "Base:       {}".format( base )     )
+            print( "Exponent:   {}".format( exponent ) )
+            print( "n:          {}".format( n )        )
+
+            print( "Reference:  {}".format( ref )    )
+            print( "Table:      {}".format( table )  )
+            print( "Cached:     {}".format( cached ) )
+
+            assert False
+
+def test_fixed_base_cache( n ):
+    '''
+    Tests that a FixedBaseCache stays within its memory
+    budget, evicting the least recently used tables
+    '''
+
+    size = FixedBase( 2, get_context( n ) ).nbytes()
+
+    def check( cache, hits, misses, evictions, curr_bytes ):
+        info = cache.info()
+        if( ( info.hits, info.misses, info.evictions, info.curr_bytes ) !=
+            ( hits, misses, evictions, curr_bytes ) ):
+            print( "ERROR: Fixed-base cache counters are wrong!" )
+
+            print( "n:          {}".format( n )    )
+            print( "Table size: {}".format( size ) )
+
+            print( "Expected:   hits={}, misses={}, evictions={}, curr_bytes={}".format(
+                hits, misses, evictions, curr_bytes ) )
+            print( "Got:        {}".format( info ) )
+
+            assert False
+
+    # Room for two tables: the third evicts the least recently used
+
+    cache = FixedBaseCache( max_bytes = 2 * size )
+
+    cache.get( 2, n )
+    cache.get( 3, n )
+    check( cache, 0, 2, 0, 2 * size )
+
+    cache.get( 2, n )
+    check( cache, 1, 2, 0, 2 * size )
+
+    cache.get( 5, n )
+    check( cache, 1, 3, 1, 2 * size )
+
+    cache.get( 2, n ) # Still cached
+    cache.get( 3, n ) # Evicted, so built again, evicting 5
+    check( cache, 2, 4, 2, 2 * size )
+
+    cache.get( 5, n )
+    check( cache, 2, 5, 3, 2 * size )
+
+    cache.clear()
+    check( cache, 0, 0, 0, 0 )
+
+    # A table larger than the whole budget is returned, but not cached
+
+    cache = FixedBaseCache( max_bytes = size - 1 )
+
+    table = cache.get( 2, n )
+    check( cache, 0, 1, 0, 0 )
+
+    if( table.mod_exp( n - 2 ) != pow( 2, n - 2, n ) ):
+        print( "ERROR: Uncached fixed-base table is wrong!" )
+        assert False
+
+def test_multi_mod_exp( pairs, n ):
+    '''
+    Tests that multi-exponentiation under n gives the product
+    of each base raised to its exponent, as computed with
+    Python's pow
+    '''
+
+    ref = 1
+    for base, exponent in pairs:
+        ref = ( ref * pow( base, exponent, n ) ) % n
+
+    mont = get_context( n ).multi_mod_exp( pairs )
+
+    if( ref != mont ): # We don't agree
+        print( "ERROR: Multi-exponentiation doesn't agree!" )
+
+        print( "Pairs:      {}".format( pairs ) )
+        print( "n:          {}".format( n )     )
+
+        print( "Reference:  {}".format( ref )  )
+        print( "Montgomery: {}".format( mont ) )
+
+        assert False
+
 if __name__ == "__main__":
 
-    for i in range( 1000 ): # Run 100 tests
+    keys = load_keys( 1000, 32 )
+
+    for i in range( 1000 ): # Run 1000 tests
         
-        # Generate keys
-        n, e, d = gen_keys( 32 )
+        # Get keys
+        n, e, d, crt = keys[i]
 
         # Generate a random message such that 0 <= M < n
         message = randint( 0, n - 1 )
@@ -103,8 +617,11 @@ if __name__ == "__main__":
         # Decrypt the message
         new_message = test_decrypt( ciphertext, d, n )
 
+        # Decrypt the message using the CRT
+        crt_message = test_decrypt_crt( ciphertext, d, n, crt )
+
         # Ensure that they're the same
-        if( message != new_message ):
+        if( ( message != new_message ) or ( message != crt_message ) ):
             print( "ERROR: Didn't get same message back!" )
 
             print( "n:              {}".format( n ) )
@@ -119,5 +636,125 @@ if __name__ == "__main__":
 
         print( "Test {} passed".format( i ) )
 
+    # Key generation: the primality test and the candidate sieve
+
+    test_is_prime()
+
+    for bits in [ 3, 8, 16, 22, 64, 512 ]:
+        test_sieve_candidates( bits, 200 )
+
+    print( "Prime tests passed" )
+
+    # Key pool: one worker, and several sharing the queue
+
+    test_key_pool( 32, 4, 1 )
+    test_key_pool( 64, 8, 3 )
+
+    print( "Key pool tests passed" )
+
+    # Batch encryption and decryption: an empty batch, a single
+    # message, and batches including the extreme messages
+
+    for n, e, d, crt in keys[:20]:
+        test_batch( [], e, d, n )
+        test_batch( [ randint( 0, n - 1 ) ], e, d, n )
+        test_batch( [ 0, 1, n - 1 ] + [ randint( 0, n - 1 ) for i in range( 8 ) ], e, d, n )
+
+    print( "Batch tests passed" )
+
+    # Parallel execution, with a single worker, several workers, and
+    # empty or single-value inputs
+
+    n, e, d, crt = keys[0]
+    messages     = [ randint( 0, n - 1 ) for i in range( 100 ) ]
+
+    for engine in [ "naive", "montgomery", "montgomery_hardware" ]:
+        test_parallel( engine, 1, e, d, n, messages )
+        test_parallel( engine, 4, e, d, n, messages )
+        test_parallel( engine, 4, e, d, n, [] )
+        test_parallel( engine, 4, e, d, n, messages[:1] )
+
+    print( "Parallel tests passed" )
+
+    # Sliding window exponentiation, with exponents on either side of
+    # each window size threshold, as well as every explicit window size
+
+    test_window_size_for()
+
+    for n, e, d, crt in keys[:20]:
+
+        test_mod_exp_window( randint( 0, n - 1 ), 0, n )
+
+        for exponent_bits in [ 1, 2, 23, 24, 79, 80, 239, 240, 671, 672 ]:
+            exponent = randint( 1 << ( exponent_bits - 1 ), ( 1 << exponent_bits ) - 1 )
+            test_mod_exp_window( randint( 0, n - 1 ), exponent, n )
+
+        for window_size in range( 1, 7 ):
+            test_mod_exp_window( randint( 0, n - 1 ), d, n, window_size )
+
+    print( "Sliding window tests passed" )
+
+    # Montgomery ladder: exponents of 0 and 1, the private exponent,
+    # and exponents with the top bit of the modulus set
+
+    for n, e, d, crt in keys[:20]:
+
+        bits = n.bit_length()
+
+        for exponent in [ 0, 1, d, n - 1, ( 1 << ( bits - 1 ) ),
+                          ( 1 << bits ) - 1, randint( 1 << ( bits - 1 ), n - 1 ) ]:
+            test_ladder( randint( 0, n - 1 ), exponent, n )
+
+        test_ladder( 0, d, n )
+        test_ladder( 1, d, n )
+        test_ladder( n - 1, d, n )
+
+    n = randint( 1 << 1023, ( 1 << 1024 ) - 1 ) | 1
+
+    for exponent in [ 0, 1, ( 1 << 1023 ), ( 1 << 1024 ) - 1 ]:
+        test_ladder( randint( 0, n - 1 ), exponent, n )
+
+    print( "Ladder tests passed" )
+
+    # CIOS Montgomery multiplication at RSA sizes, for several word
+    # sizes (including ones that don't divide the modulus length).
+    # Only an odd modulus is needed, so random ones are used rather
+    # than generating large keys
+
+    for bits in [ 32, 1024, 2048 ]:
+        for word_bits in [ 7, 8, 16, 32, 64, 96 ]:
+            n = randint( 1 << ( bits - 1 ), ( 1 << bits ) - 1 ) | 1
+            test_mont_cios( n, word_bits )
+
+    print( "CIOS tests passed" )
+
+    # Fixed-base exponentiation, with a few keys and bases
+
+    for n, e, d, crt in keys[:20]:
+        test_fixed_base( randint( 0, n - 1 ), n )
+        test_fixed_base( 1, n )
+
+    test_fixed_base_cache( keys[0][0] )
+
+    print( "Fixed-base tests passed" )
+
+    # Multi-exponentiation: no pairs, one pair, zero exponents, and
+    # more pairs than fit in one subset table
+
+    for n, e, d, crt in keys[:20]:
+
+        def random_pairs( count ):
+            return [ ( randint( 0, n - 1 ), randint( 0, n - 1 ) ) for i in range( count ) ]
+
+        test_multi_mod_exp( [], n )
+        test_multi_mod_exp( random_pairs( 1 ), n )
+        test_multi_mod_exp( [ ( randint( 0, n - 1 ), 0 ) ], n )
+        test_multi_mod_exp( [ ( base, 0 ) for base, exponent in random_pairs( 3 ) ], n )
+        test_multi_mod_exp( random_pairs( 2 ) + [ ( randint( 0, n - 1 ), 0 ) ], n )
+        test_multi_mod_exp( random_pairs( MULTI_EXP_GROUP ), n )
+        test_multi_mod_exp( random_pairs( 2 * MULTI_EXP_GROUP + 1 ), n )
+
+    print( "Multi-exponentiation tests passed" )
+
     # If we got here, all tests passed
     print( "All tests passed!" )
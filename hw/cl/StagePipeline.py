@@ -0,0 +1,69 @@
+#=========================================================================
+# StagePipeline
+#=========================================================================
+# Timing for a chain of stages, each computing its output as soon as it
+# accepts a message and holding it until its latency has passed. A stage
+# takes a new message only if it had room at the start of the cycle, so
+# a stage that hands off its message can't accept another until the next
+# cycle (as with the RTL's IDLE-after-DONE FSMs). Queues between stages
+# are stages that pass their messages through after one cycle.
+#
+# Each stage is a ( step, capacity ) pair, where step( msg ) returns the
+# stage's output message and its latency in cycles. Shared by the CL
+# models of both accelerators.
+
+from collections import deque
+
+class StagePipeline:
+
+  def __init__( s, stages ):
+    s.stages = stages
+    s.reset()
+
+  def reset( s ):
+    s.cycle = 0
+    s.slots = [ deque() for stage in s.stages ]
+
+  def can_accept( s ):
+    return len( s.slots[0] ) < s.stages[0][1]
+
+  def output( s ):
+    '''
+    The last stage's output message if it is ready this cycle, else None
+    '''
+
+    last = s.slots[-1]
+    if last and last[0][1] <= s.cycle:
+      return last[0][0]
+    return None
+
+  def enter( s, index, msg ):
+    step = s.stages[ index ][0]
+    out_msg, latency = step( msg )
+    s.slots[ index ].append( ( out_msg, s.cycle + latency ) )
+
+  def tick( s, in_msg, out_taken ):
+    '''
+    Ends the cycle: in_msg is the message accepted this cycle (or None)
+    and out_taken whether the output was taken
+    '''
+
+    full = [ len( slot ) >= capacity
+             for slot, ( step, capacity ) in zip( s.slots, s.stages ) ]
+
+    if out_taken:
+      s.slots[-1].popleft()
+
+    for i in reversed( range( len( s.stages ) - 1 ) ):
+      slot = s.slots[i]
+      if slot and slot[0][1] <= s.cycle and not full[i+1]:
+        s.enter( i + 1, slot.popleft()[0] )
+
+    if in_msg is not None:
+      assert not full[0]
+      s.enter( 0, in_msg )
+
+    s.cycle += 1
+
+  def line_trace( s ):
+    return "".join( str( len( slot ) ) for slot in s.slots )
@@ -2,8 +2,13 @@
 # conftest
 #=========================================================================
 
+import fcntl
+import hashlib
+import os
 import pytest
 import random
+import shutil
+import subprocess
 
 #-------------------------------------------------------------------------
 # pytest_addoption
@@ -17,6 +22,21 @@ def pytest_addoption(parser):
   parser.addoption( "--vrtl", action="store_true",
                     help="use VRTL implementations" )
 
+  parser.addoption( "--update-perf-baselines", action="store_true",
+                    help="record perf test cycle counts as new baselines" )
+
+  parser.addoption( "--perf-tolerance", type=float, default=0.02,
+                    help="fraction perf tests may exceed their baselines by" )
+
+  parser.addoption( "--xcel-stats-dir", default=None,
+                    help="write per-operation xcel cycle counts as CSV here" )
+
+  parser.addoption( "--build-cache-dir", default=default_build_cache_dir,
+                    help="where to keep translated and verilated models" )
+
+  parser.addoption( "--no-build-cache", action="store_true",
+                    help="build models in the working directory instead" )
+
 #-------------------------------------------------------------------------
 # Handle other command line options
 #-------------------------------------------------------------------------
@@ -30,20 +50,30 @@ def pytest_configure(config):
   elif config.option.vrtl:
     sys._pymtl_rtl_override = 'verilog'
 
+  # Tests run inside the build cache, so make output paths absolute
+
+  if config.option.xcel_stats_dir is not None:
+    config.option.xcel_stats_dir = os.path.abspath( config.option.xcel_stats_dir )
+
 def pytest_unconfigure(config):
   import sys
   del sys._called_from_test
   del sys._pymtl_rtl_override
 
 #-------------------------------------------------------------------------
-# fix_randseed
+# pytest_report_header
 #-------------------------------------------------------------------------
 
 def pytest_report_header(config):
+  lines = []
   if config.option.prtl:
-    return "forcing RTL language to be pymtl"
+    lines.append( "forcing RTL language to be pymtl" )
   elif config.option.vrtl:
-    return "forcing RTL language to be verilog"
+    lines.append( "forcing RTL language to be verilog" )
+  build_dir = getattr( config, "build_dir", None )
+  if build_dir is not None:
+    lines.append( "building models in " + build_dir )
+  return lines
 
 #-------------------------------------------------------------------------
 # fix_randseed
@@ -55,3 +85,192 @@ def fix_randseed():
   """Set the random seed prior to each test case."""
   random.seed(0xdeadbeef)
 
+#-------------------------------------------------------------------------
+# perf_opts
+#-------------------------------------------------------------------------
+# options for checking perf tests against their stored baselines
+
+@pytest.fixture
+def perf_opts( request ):
+  """Perf baseline options from the command line."""
+  return {
+    'update'    : request.config.getoption( "update_perf_baselines" ),
+    'tolerance' : request.config.getoption( "perf_tolerance" ),
+  }
+
+#-------------------------------------------------------------------------
+# xcel_stats_file
+#-------------------------------------------------------------------------
+# CSV file for an xcel test's per-operation cycle counts, named after the
+# test module and parameters, or None if --xcel-stats-dir wasn't given
+
+@pytest.fixture
+def xcel_stats_file( request ):
+  """Where to export xcel cycle counts for this test, if anywhere."""
+  import os
+  stats_dir = request.config.getoption( "xcel_stats_dir" )
+  if stats_dir is None:
+    return None
+  os.makedirs( stats_dir, exist_ok=True )
+  name = request.node.module.__name__.split( "." )[-1]
+  if hasattr( request.node, "callspec" ):
+    name += "-" + request.node.callspec.id
+  return os.path.join( stats_dir, name + ".csv" )
+
+#-------------------------------------------------------------------------
+# Build cache
+#-------------------------------------------------------------------------
+# PyMTL translates and verilates models into the working directory, and
+# only reuses what it finds there if the translated Verilog is unchanged.
+# Rather than rebuilding in every fresh build directory, tests run inside
+# a cache directory keyed by a hash of everything that goes into the
+# build: the Verilog and PyMTL sources under hw/ (test directories and
+# build directories such as hw/build and the cache itself excluded), the
+# options that change how models are built, and the tool versions. Each
+# RTL language override gets its own subdirectory, so
+# switching between --prtl and --vrtl doesn't evict the other's models.
+# Models with different parameters already have different names, so they
+# share a directory.
+#
+# Waveform and testbench dumps are written to the working directory, so
+# the cache is bypassed when they are enabled.
+
+hw_dir                  = os.path.dirname( os.path.abspath( __file__ ) )
+default_build_cache_dir = os.path.join( hw_dir, ".buildcache" )
+
+# Build directories kept, most recently used first
+
+build_cache_size = 4
+
+build_options = [ "test_verilog", "dump_vcd", "dump_vtb" ]
+
+def build_sources():
+  """Paths of the sources that go into a build, relative to hw/."""
+  sources = []
+  for root, dirs, files in os.walk( hw_dir ):
+    dirs[:] = sorted( d for d in dirs if d not in ( "test", "build", "__pycache__" )
+                      and not d.startswith( "." ) )
+    for name in sorted( files ):
+      if name.endswith( ( ".v", ".py", ".ini" ) ) and name != "conftest.py":
+        sources.append( os.path.relpath( os.path.join( root, name ), hw_dir ) )
+  return sources
+
+def tool_versions():
+  """Version strings of PyMTL and Verilator, as far as they can be found."""
+  try:
+    import pymtl3
+    versions = [ getattr( pymtl3, "__version__", "unknown" ) ]
+  except ImportError:
+    versions = [ "no pymtl3" ]
+  try:
+    versions.append( subprocess.run( [ "verilator", "--version" ], capture_output=True,
+                                     text=True ).stdout.strip() )
+  except OSError:
+    versions.append( "no verilator" )
+  return versions
+
+def build_key( config ):
+  """Content hash of the sources, build options and tools."""
+  h = hashlib.sha256()
+  for path in build_sources():
+    h.update( path.encode() + b"\0" )
+    with open( os.path.join( hw_dir, path ), "rb" ) as f:
+      h.update( hashlib.sha256( f.read() ).digest() )
+  for option in build_options:
+    h.update( "{}={!r}\0".format( option, config.getoption( option, None ) ).encode() )
+  for version in tool_versions():
+    h.update( version.encode() + b"\0" )
+  return h.hexdigest()[:16]
+
+def prune_build_cache( cache_dir, keep ):
+  """Removes all but the keep most recently used build directories."""
+  entries = [ os.path.join( cache_dir, name ) for name in os.listdir( cache_dir ) ]
+  entries = sorted( ( path for path in entries if os.path.isdir( path ) ),
+                    key=os.path.getmtime, reverse=True )
+  for path in entries[keep:]:
+    shutil.rmtree( path, ignore_errors=True )
+
+def pytest_sessionstart( session ):
+  config = session.config
+
+  # Parallel workers use the build directory chosen by the controller
+
+  if hasattr( config, "workerinput" ):
+    config.build_dir = config.workerinput["build_dir"]
+    lock_translation_import()
+    return
+
+  config.build_dir = None
+  lock_translation_import()
+
+  if config.option.no_build_cache or any(
+      config.getoption( option, None ) for option in build_options[1:] ):
+    return
+
+  import sys
+  cache_dir = os.path.abspath( config.option.build_cache_dir )
+  key_dir   = os.path.join( cache_dir, build_key( config ) )
+  language  = sys._pymtl_rtl_override or "default"
+
+  config.build_dir = os.path.join( key_dir, language )
+  os.makedirs( config.build_dir, exist_ok=True )
+  os.utime( key_dir )
+
+  prune_build_cache( cache_dir, build_cache_size )
+
+#-------------------------------------------------------------------------
+# Parallel execution
+#-------------------------------------------------------------------------
+# With pytest-xdist installed, the suites can be spread across cores:
+#
+#   pytest ../rsa_xcel_naive ../rsa_xcel_mont -n auto
+#
+# The controller picks the build directory and hands it to every worker,
+# so all of them share one set of models. Translating and verilating is
+# done under an exclusive lock on the directory the model is built in:
+# the first worker to need a DUT builds it, and the others wait and then
+# find it up to date, so each DUT is only verilated once. Simulations
+# themselves run concurrently.
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node( node ):
+  node.workerinput["build_dir"] = node.config.build_dir
+
+build_lock_name = ".build.lock"
+
+def lock_translation_import():
+  """Makes every translate-and-import hold the build directory's lock."""
+  try:
+    from pymtl3.passes.backends.verilog import VerilogTranslationImportPass
+  except ImportError:
+    return
+
+  call = VerilogTranslationImportPass.__call__
+  if getattr( call, "build_locked", False ):
+    return
+
+  def locked_call( self, top ):
+    with open( os.path.join( os.getcwd(), build_lock_name ), "a" ) as lock:
+      fcntl.flock( lock, fcntl.LOCK_EX )
+      try:
+        return call( self, top )
+      finally:
+        fcntl.flock( lock, fcntl.LOCK_UN )
+
+  locked_call.build_locked = True
+  VerilogTranslationImportPass.__call__ = locked_call
+
+#-------------------------------------------------------------------------
+# build_dir
+#-------------------------------------------------------------------------
+# run each test inside the build cache, so PyMTL reuses models built by
+# earlier sessions
+
+@pytest.fixture(autouse=True)
+def build_dir( request, monkeypatch ):
+  """The directory models are built in for this session."""
+  build_dir = request.config.build_dir
+  if build_dir is None:
+    return os.getcwd()
+  monkeypatch.chdir( build_dir )
+  return build_dir
@@ -0,0 +1,49 @@
+#=========================================================================
+# ModDiv CL Model
+#=========================================================================
+# Cycle counts of ModDiv, for the CL models of the units built on it
+
+#-------------------------------------------------------------------------
+# mod_div_cycles
+#-------------------------------------------------------------------------
+# Cycles ModDiv #( nbits ) takes to compute opa % opb, from accepting its
+# input (in IDLE) to having its output valid (in DONE). Mirrors the FSM:
+# IDLE exits early if opb > opa; SHIFT_OPB shifts the divisor left until
+# its MSB is set or it would pass opa; CALC then shifts it back right,
+# subtracting as it goes, until it is back where it started or equals
+# what remains of opa.
+
+def mod_div_cycles( opa, opb, nbits ):
+
+  assert opb != 0, "ModDiv never finishes dividing by zero"
+
+  if opb > opa:
+    return 1
+
+  mask   = ( 1 << nbits ) - 1
+  cycles = 1
+
+  # SHIFT_OPB (skipped if the MSB is already set)
+
+  opb_reg = opb
+  if not ( opb_reg >> ( nbits - 1 ) ) & 1:
+    while True:
+      cycles += 1
+      done    = ( ( opb_reg >> ( nbits - 2 ) ) & 1 ) or ( ( opb_reg << 1 ) & mask ) > opa
+      opb_reg = ( opb_reg << 1 ) & mask
+      if done:
+        break
+
+  # CALC
+
+  opa_reg = opa
+  while True:
+    cycles += 1
+    done    = ( opb_reg == opb ) or ( opb_reg == opa_reg )
+    if opb_reg <= opa_reg:
+      opa_reg = opa_reg - opb_reg
+    opb_reg = opb_reg >> 1
+    if done:
+      break
+
+  return cycles
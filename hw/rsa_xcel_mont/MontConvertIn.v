@@ -2,6 +2,10 @@
 // MontConvertIn.v
 //========================================================================
 // Converts our inputs into Montgomery Form
+//
+// R^2 mod n from the last division is kept, along with its n, so that
+// consecutive messages under the same modulus (such as a stream of
+// bases encrypted under one key) skip the division entirely
 
 `ifndef RSA_XCEL_MONT_MONTCONVERTIN_V
 `define RSA_XCEL_MONT_MONTCONVERTIN_V
@@ -39,11 +43,27 @@ module rsa_xcel_mont_MontConvertIn
     assign e_in = istream_msg[63:32];
     assign n_in = istream_msg[95:64];
 
+    // Cached R^2 mod n, valid once a division has completed
+
+    logic        cache_val;
+    logic [31:0] cache_n;
+    logic [31:0] cache_R_2_mod_n;
+
+    logic cache_hit;
+    assign cache_hit = cache_val & ( n_in == cache_n );
+
+    // A message that hits in the cache waits here (instead of in the
+    // divider) to be sent to the MontMulRems
+
+    logic hit_pending;
+
     // Declare remainder unit for calculating R^2 mod n
 
     localparam R_2 = 65'h10000000000000000;
 
     logic [64:0] rem_result;
+    logic        rem_istream_val;
+    logic        rem_istream_rdy;
     logic        rem_ostream_val;
     logic        rem_ostream_rdy;
 
@@ -52,8 +72,8 @@ module rsa_xcel_mont_MontConvertIn
       .clk         ( clk ),
       .reset       ( reset ),
 
-      .istream_val ( istream_val ),
-      .istream_rdy ( istream_rdy ),
+      .istream_val ( rem_istream_val ),
+      .istream_rdy ( rem_istream_rdy ),
       .istream_msg ( { 1'b1, R_2, { 33'b0, n_in } } ),
 
       .ostream_val ( rem_ostream_val ),
@@ -61,8 +81,14 @@ module rsa_xcel_mont_MontConvertIn
       .ostream_msg ( rem_result )
     );
 
+    // Only take a new message once the previous one has left both the
+    // divider and the hit register, so messages stay in order
+
+    assign istream_rdy     = rem_istream_rdy & !hit_pending;
+    assign rem_istream_val = istream_val & istream_rdy & !cache_hit;
+
     logic [31:0] R_2_mod_n;
-    assign R_2_mod_n = rem_result[31:0];
+    assign R_2_mod_n = ( hit_pending ) ? cache_R_2_mod_n : rem_result[31:0];
 
     // Register our other inputs, to keep track of them
     // with our overall message
@@ -134,7 +160,33 @@ module rsa_xcel_mont_MontConvertIn
     // Handle MontMulRem input val/rdy logic
 
     assign rem_ostream_rdy  = r_montmulrem_i_rdy & b_montmulrem_i_rdy;
-    assign montmulrem_i_val = rem_ostream_val & rem_ostream_rdy;
+    assign montmulrem_i_val = ( rem_ostream_val | hit_pending ) & rem_ostream_rdy;
+
+    // Track messages that hit in the cache, and fill the cache from each
+    // division as it is sent on
+
+    always @( posedge clk ) begin
+        if( reset )
+            hit_pending <= 0;
+        else if( istream_val & istream_rdy & cache_hit )
+            hit_pending <= 1;
+        else if( montmulrem_i_val )
+            hit_pending <= 0;
+    end
+
+    always @( posedge clk ) begin
+        if( reset ) begin
+            cache_val       <= 0;
+            cache_n         <= 0;
+            cache_R_2_mod_n <= 0;
+        end
+
+        else if( rem_ostream_val & rem_ostream_rdy ) begin
+            cache_val       <= 1;
+            cache_n         <= n_reg1;
+            cache_R_2_mod_n <= rem_result[31:0];
+        end
+    end
 
     // Handle MontMulRem output val/rdy logic
 
@@ -0,0 +1,150 @@
+#=========================================================================
+# MontModExp CL Model
+#=========================================================================
+# Cycle-approximate model of MontModExp, for exploring latencies and
+# queueing without rebuilding the Verilog
+#
+# As in the RTL, a message passes through four units, each of which
+# holds one message at a time, so up to four exponentiations can be in
+# flight:
+#
+#  1. MontConvertIn's ModDiv, computing R^2 mod n (data-dependent, see
+#     mod_div_cycles), or a single cycle if the modulus is the same as
+#     the last division's
+#  2. MontConvertIn's two MontMulRems, converting 1 and the base into
+#     n-residue format
+#  3. MontModExpMul, spending one cycle in IDLE and then, for each
+#     exponent bit (at least one), a MontMulRem plus one cycle to move
+#     back to SEND
+#  4. MontConvertOut's MontMulRem, converting the result back out
+#
+# The defaults reproduce the RTL; the constructor parameters change the
+# latency of each piece:
+#
+#  mulrem_latency : cycles for each MontMulRem (the RTL's four AddReds
+#                   stages)
+#  div_latency    : cycles for the ModDiv, or None to model the RTL's
+#                   data-dependent latency
+#  ctrl_cycles    : MontModExpMul's control overhead at the start and in
+#                   each iteration
+#  queue_depth    : entries in a queue after MontConvertIn and after
+#                   MontModExpMul (0 for none, as in the RTL)
+#  r2_cache       : whether R^2 mod n is reused while n is unchanged
+
+from pymtl3 import *
+from pymtl3.stdlib.stream.ifcs import IStreamIfc, OStreamIfc
+
+from cl.StagePipeline             import StagePipeline
+from div.ModDivCL                 import mod_div_cycles
+from rsa_xcel_mont.MontMultiplier import MontMultiplier
+
+class MontModExpCL( Component ):
+
+  # Constructor
+
+  def construct( s, mulrem_latency=4, div_latency=None, ctrl_cycles=1,
+                 queue_depth=0, r2_cache=True ):
+
+    # Interface
+
+    s.istream = IStreamIfc( mk_bits( 96 ) )
+    s.ostream = OStreamIfc( Bits32 )
+
+    # Latency knobs
+
+    s.mulrem_latency = mulrem_latency
+    s.div_latency    = div_latency
+    s.ctrl_cycles    = ctrl_cycles
+    s.r2_cache       = r2_cache
+
+    # Modulus of the last division, whose R^2 mod n MontConvertIn keeps
+
+    s.cached_n = None
+
+    stages = [ ( s.convert_in_div,    1 ),
+               ( s.convert_in_mulrem, 1 ),
+               ( s.mod_exp_mul,       1 ),
+               ( s.convert_out,       1 ) ]
+
+    if queue_depth > 0:
+      stages.insert( 3, ( s.queue, queue_depth ) )
+      stages.insert( 2, ( s.queue, queue_depth ) )
+
+    s.pipe = StagePipeline( stages )
+
+    # CL block
+
+    @update_ff
+    def up_montmodexp_cl():
+
+      if s.reset:
+        s.pipe.reset()
+        s.cached_n = None
+      else:
+        in_msg = None
+        if s.istream.val & s.istream.rdy:
+          in_msg = ( int( s.istream.msg[ 0:32] ), int( s.istream.msg[32:64] ),
+                     int( s.istream.msg[64:96] ) )
+        s.pipe.tick( in_msg, s.ostream.val & s.ostream.rdy )
+
+      result = s.pipe.output()
+
+      s.istream.rdy <<= 1 if s.pipe.can_accept() else 0
+      s.ostream.val <<= 0 if result is None else 1
+      s.ostream.msg <<= 0 if result is None else result
+
+  # Stages, each returning its output and latency. Messages carry a
+  # MontMultiplier for their modulus, which (like the RTL's MontMulRem)
+  # reduces its result with a single subtraction
+
+  def convert_in_div( s, msg ):
+    b, e, n = msg
+
+    if s.r2_cache and n == s.cached_n:
+      latency = 1
+    elif s.div_latency is None:
+      latency = mod_div_cycles( 1 << 64, n, 65 )
+    else:
+      latency = s.div_latency
+
+    return ( b, e, MontMultiplier( n, 1 << 32 ) ), latency
+
+  # A message enters the MontMulRems as its division finishes, which is
+  # when MontConvertIn fills its cache with the new R^2 mod n
+
+  def convert_in_mulrem( s, msg ):
+    b, e, mont = msg
+    s.cached_n = mont.mod
+    r = mont.multiply( 1, mont.convert_in_factor )
+    b = mont.multiply( b, mont.convert_in_factor )
+    return ( r, b, e, mont ), s.mulrem_latency
+
+  def mod_exp_mul( s, msg ):
+    r, b, e, mont = msg
+
+    cycles = s.ctrl_cycles
+
+    while True:
+      if e & 1:
+        r = mont.multiply( r, b )
+      b = mont.multiply( b, b )
+      e = e >> 1
+
+      cycles += s.mulrem_latency + s.ctrl_cycles
+
+      if e == 0:
+        break
+
+    return ( r, mont ), cycles
+
+  def convert_out( s, msg ):
+    r, mont = msg
+    return mont.multiply( r, 1 ), s.mulrem_latency
+
+  def queue( s, msg ):
+    return msg, 1
+
+  # Line tracing
+
+  def line_trace( s ):
+    return f"{s.istream}({s.pipe.line_trace()}){s.ostream}"
@@ -4,7 +4,9 @@
 # FL model of a Montgomery multiplier, verified through algorithm testing
 #
 # This will be used to verify the intermediate results of the Montgomery
-# algorithm
+# algorithm, and by the FL and CL models of the accelerator. Like
+# MontMulRem, it only subtracts the modulus from results greater than it,
+# so a result that is 0 mod n comes out as n.
 
 import math
 
@@ -18,6 +18,12 @@
 //  5. Wait for accelerator to finish by reading xr0, result will be the
 //     result of modular exponentiation
 //
+// The registers keep their values between operations, so a stream of
+// bases under one key (sticky-key mode) only needs the exponent and
+// modulus written once. Each base after that is just steps 1, 4 and 5.
+// MontConvertIn also keeps R^2 mod n, so it is only computed once per
+// modulus.
+//
 
 `ifndef RSA_XCEL_NAIVE_RSAXCEL_V
 `define RSA_XCEL_NAIVE_RSAXCEL_V
@@ -0,0 +1,160 @@
+#=========================================================================
+# RSA Mont Xcel Unit FL Model
+#=========================================================================
+# RSA modular exponentiation accelerator, computing with Montgomery
+# multiplication on n-residue values as RSAMontXcel does
+#
+# Accelerator register interface:
+#
+#  xr0 : go/done
+#  xr1 : base
+#  xr2 : exponent
+#  xr3 : modulus
+#
+# Accelerator protocol involves the following steps:
+#  1. Write the base via xr1
+#  2. Write the exponent via xr2
+#  3. Write the modulus via xr3
+#  4. Tell accelerator to go by writing xr0
+#  5. Wait for accelerator to finish by reading xr0, result will be the
+#     result of modular exponentiation
+#
+# The registers keep their values between operations, so a stream of
+# bases under one key (sticky-key mode) only needs the exponent and
+# modulus written once. Each base after that is just steps 1, 4 and 5.
+# As in MontConvertIn, R^2 mod n is then only computed once per modulus.
+#
+# As in the RTL, the modulus must be odd (so that it is coprime with
+# R = 2^32), and the result is computed by converting the base into
+# n-residue format, exponentiating with Montgomery multiplication, and
+# converting back out
+#
+
+from pymtl3 import *
+from pymtl3.stdlib.xcel.ifcs import XcelResponderIfc
+from pymtl3.stdlib.xcel      import XcelMsgType, mk_xcel_msg
+from pymtl3.stdlib.stream    import OStreamBlockingAdapterFL
+from pymtl3.stdlib.stream    import IStreamBlockingAdapterFL
+
+from rsa_xcel_mont.MontMultiplier import MontMultiplier
+
+#-------------------------------------------------------------------------
+# mont_mod_exp
+#-------------------------------------------------------------------------
+# Montgomery modular exponentiation, as performed by MontConvertIn,
+# MontModExpMul and MontConvertOut, with a MontMultiplier for the modulus
+#
+# MontMultiplier, like the RTL's MontMulRem, leaves a result that is 0
+# mod n as n, so the result is fully reduced at the end. This only
+# matters when every prime factor of n divides the base, which for an
+# RSA modulus (two distinct primes) means the base is 0 mod n and the
+# result is 0 anyway. For other moduli, such as n = 169 with base 65,
+# the FL model returns 0 where the RTL returns n.
+
+def mont_mod_exp( base, exponent, MontMult ):
+
+  result = MontMult.convert_in( 1 )
+  base   = MontMult.convert_in( base % MontMult.mod )
+
+  while exponent > 0:
+
+    if exponent % 2 == 1:
+      result = MontMult.multiply( result, base )
+
+    exponent = exponent >> 1
+    base     = MontMult.multiply( base, base )
+
+  result = MontMult.convert_out( result )
+
+  if result >= MontMult.mod:
+    result = result - MontMult.mod
+
+  return result
+
+class RSAMontXcelFL( Component ):
+
+  def construct( s ):
+
+    XcelReqMsg, XcelRespMsg = mk_xcel_msg( 5, 32 )
+
+    # Interface
+
+    s.xcel = XcelResponderIfc( XcelReqMsg, XcelRespMsg )
+
+    # Proc <-> Xcel Adapters
+
+    s.xcelreq_q  = IStreamBlockingAdapterFL( XcelReqMsg  )
+    s.xcelresp_q = OStreamBlockingAdapterFL( XcelRespMsg )
+
+    connect( s.xcelreq_q.istream,  s.xcel.reqstream  )
+    connect( s.xcelresp_q.ostream, s.xcel.respstream )
+
+    # Storage
+
+    s.base  = 0
+    s.exp   = 0
+    s.mod   = 0
+
+    # Multiplier (and so R^2 mod n) for the last modulus used
+
+    s.mont  = None
+
+    @update_once
+    def up_mont_xcel():
+
+      # We loop handling accelerator requests. We are only expecting
+      # writes to xr0-2, so any other requests are an error. We exit the
+      # loop when we see the write to xr0.
+
+      go = False
+      while not go:
+
+        xcelreq_msg = s.xcelreq_q.deq()
+
+        if xcelreq_msg.type_ == XcelMsgType.WRITE:
+          assert xcelreq_msg.addr in [0,1,2,3], \
+            "Only reg writes to 0,1,2,3 allowed during setup!"
+
+          # Use xcel register address to configure accelerator
+
+          if   xcelreq_msg.addr == 0: go = True
+          elif xcelreq_msg.addr == 1: s.base  = xcelreq_msg.data
+          elif xcelreq_msg.addr == 2: s.exp   = xcelreq_msg.data
+          elif xcelreq_msg.addr == 3: s.mod   = xcelreq_msg.data
+
+          # Send xcel response message
+
+          s.xcelresp_q.enq( XcelRespMsg( XcelMsgType.WRITE, 0 ) )
+
+      # Compute result
+
+      assert int( s.mod ) % 2 == 1, \
+        "Montgomery multiplication needs an odd modulus!"
+
+      if s.mont is None or s.mont.mod != int( s.mod ):
+        s.mont = MontMultiplier( int( s.mod ), ( 1 << 32 ) )
+
+      result = mont_mod_exp( int( s.base ), int( s.exp ), s.mont )
+
+      # Now wait for read of xr0
+
+      xcelreq_msg = s.xcelreq_q.deq()
+
+      # Only expecting read from xr0, so any other request is an xcel
+      # protocol error.
+
+      assert xcelreq_msg.type_ == XcelMsgType.READ, \
+        "Only reg reads allowed during done phase!"
+
+      assert xcelreq_msg.addr == 0, \
+        "Only reg read to 0 allowed during done phase!"
+
+      # Send xcel response message indicating xcel is done
+
+      s.xcelresp_q.enq( XcelRespMsg( XcelMsgType.READ, result ) )
+
+  # Line tracing
+
+  def line_trace( s ):
+    return f"{s.xcel.reqstream}(){s.xcel.respstream}"
+
@@ -10,8 +10,9 @@ from pymtl3 import *
 from pymtl3.stdlib.test_utils import mk_test_case_table, run_sim
 from pymtl3.stdlib.stream import StreamSourceFL, StreamSinkFL
 
+from div.ModDivCL import mod_div_cycles
 from rsa_xcel_mont.MontConvertIn import MontConvertIn
-from rsa_xcel_mont.test.MontMultiplier import MontMultiplier
+from rsa_xcel_mont.MontMultiplier import MontMultiplier
 
 #-------------------------------------------------------------------------
 # TestHarness
@@ -32,6 +33,21 @@ class TestHarness( Component ):
     s.src.ostream       //= s.converter.istream
     s.converter.ostream //= s.sink.istream
 
+    # Cycles at which each message is accepted and each result is taken,
+    # for checking latencies
+
+    s.cycle      = 0
+    s.in_cycles  = []
+    s.out_cycles = []
+
+    @update_ff
+    def up_timestamps():
+      if s.converter.istream.val & s.converter.istream.rdy:
+        s.in_cycles.append( s.cycle )
+      if s.converter.ostream.val & s.converter.ostream.rdy:
+        s.out_cycles.append( s.cycle )
+      s.cycle += 1
+
   def done( s ):
     return s.src.done() and s.sink.done()
 
@@ -55,6 +71,24 @@ def mk_omsg( b, e, n, r ):
                  Bits32( e, trunc_int=True ), \
                  Bits32( b, trunc_int=True ) )
 
+#-------------------------------------------------------------------------
+# r2_cache_hits
+#-------------------------------------------------------------------------
+# Which messages should find their R^2 mod n in MontConvertIn's cache.
+# It holds the modulus of the last message to go through the divider,
+# filled as that division finishes, so a message hits exactly when its
+# modulus is the same as the message before it (even if that one is
+# still being divided)
+
+def r2_cache_hits( msgs ):
+  hits     = []
+  cached_n = None
+  for msg in msgs[::2]:
+    n = int( msg[64:96] )
+    hits.append( n == cached_n )
+    cached_n = n
+  return hits
+
 #----------------------------------------------------------------------
 # Test Cases 
 #----------------------------------------------------------------------
@@ -123,6 +157,53 @@ for i in range(50):
   random_large_msgs.extend( [ mk_imsg( b, e, n ), mk_omsg( b_conv, e, n, r_conv ) ] )
 
 
+# Runs of messages under one modulus, which reuse the cached R^2 mod n,
+# switching moduli (and back) between runs
+
+same_mod_msgs = []
+for n in [ 0x6b35aebb, 0x6b35aebb, 0xe6eb1037, 0x6b35aebb ]:
+  multiplier = MontMultiplier( n, 2 ** 32 )
+  for i in range(5):
+    b = randint(0,4294967295)
+    e = randint(0,4294967295)
+
+    b_conv = multiplier.convert_in( b )
+    r_conv = multiplier.convert_in( 1 )
+
+    same_mod_msgs.extend( [ mk_imsg( b, e, n ), mk_omsg( b_conv, e, n, r_conv ) ] )
+
+# Back-to-back messages, each offered while the one before it is still
+# in the divider: a repeat of the modulus being divided must hit on the
+# entry that division fills, and one matching the entry it replaces must
+# miss
+
+hit_during_miss_msgs = []
+for n in [ 0x6b35aebb, 0xe6eb1037, 0xe6eb1037, 0x6b35aebb, 0x6b35aebb, 0xe6eb1037 ]:
+  multiplier = MontMultiplier( n, 2 ** 32 )
+  b = randint(0,4294967295)
+  e = randint(0,4294967295)
+
+  b_conv = multiplier.convert_in( b )
+  r_conv = multiplier.convert_in( 1 )
+
+  hit_during_miss_msgs.extend( [ mk_imsg( b, e, n ), mk_omsg( b_conv, e, n, r_conv ) ] )
+
+# Short runs alternating between two moduli, each switching back to a
+# modulus after the other has replaced it in the cache
+
+switch_back_msgs = []
+for n in [ 0x6b35aebb, 0xe6eb1037 ] * 3:
+  multiplier = MontMultiplier( n, 2 ** 32 )
+  for i in range(2):
+    b = randint(0,4294967295)
+    e = randint(0,4294967295)
+
+    b_conv = multiplier.convert_in( b )
+    r_conv = multiplier.convert_in( 1 )
+
+    switch_back_msgs.extend( [ mk_imsg( b, e, n ), mk_omsg( b_conv, e, n, r_conv ) ] )
+
+
 #-------------------------------------------------------------------------
 # Test Case Table
 #-------------------------------------------------------------------------
@@ -157,6 +238,27 @@ test_case_table = mk_test_case_table([
   [         "random_large",       random_large_msgs,             60,            40 ],
   [         "random_large",       random_large_msgs,             40,            60 ],
 
+  [        "same_mod_msgs",           same_mod_msgs,              0,             0 ],
+  [        "same_mod_msgs",           same_mod_msgs,             40,             0 ],
+  [        "same_mod_msgs",           same_mod_msgs,              0,            40 ],
+  [        "same_mod_msgs",           same_mod_msgs,             40,            40 ],
+  [        "same_mod_msgs",           same_mod_msgs,             60,            40 ],
+  [        "same_mod_msgs",           same_mod_msgs,             40,            60 ],
+
+  [   "hit_during_miss_msgs",    hit_during_miss_msgs,              0,             0 ],
+  [   "hit_during_miss_msgs",    hit_during_miss_msgs,             40,             0 ],
+  [   "hit_during_miss_msgs",    hit_during_miss_msgs,              0,            40 ],
+  [   "hit_during_miss_msgs",    hit_during_miss_msgs,             40,            40 ],
+  [   "hit_during_miss_msgs",    hit_during_miss_msgs,             60,            40 ],
+  [   "hit_during_miss_msgs",    hit_during_miss_msgs,             40,            60 ],
+
+  [       "switch_back_msgs",        switch_back_msgs,              0,             0 ],
+  [       "switch_back_msgs",        switch_back_msgs,             40,             0 ],
+  [       "switch_back_msgs",        switch_back_msgs,              0,            40 ],
+  [       "switch_back_msgs",        switch_back_msgs,             40,            40 ],
+  [       "switch_back_msgs",        switch_back_msgs,             60,            40 ],
+  [       "switch_back_msgs",        switch_back_msgs,             40,            60 ],
+
 ])
 
 
@@ -181,3 +283,20 @@ def test( test_params, cmdline_opts ):
 
   run_sim( th, cmdline_opts, duts=['converter'] )
 
+  # Check that hits skip the divider. A miss can't finish in fewer
+  # cycles than its division takes. With no sink delay to hold results
+  # back, a hit finishes in fewer cycles than that, counting from when
+  # it was accepted or the result before it was taken, whichever is
+  # later
+
+  for i, hit in enumerate( r2_cache_hits( test_params.msgs ) ):
+
+    n          = int( test_params.msgs[2*i][64:96] )
+    div_cycles = mod_div_cycles( 1 << 64, n, 65 )
+
+    if not hit:
+      assert th.out_cycles[i] - th.in_cycles[i] >= div_cycles
+    elif test_params.sink_delay == 0:
+      start = th.in_cycles[i] if i == 0 else max( th.in_cycles[i], th.out_cycles[i-1] )
+      assert th.out_cycles[i] - start < div_cycles
+
@@ -0,0 +1,30 @@
+#=========================================================================
+# MontModExpCL_test
+#=========================================================================
+# Checks that the CL model computes the same results as MontModExp, and
+# that its cycle counts stay within a few percent of the RTL's on the
+# same test vectors, source and sink delays.
+
+import pytest
+
+from rsa_xcel_naive.test.ModExpCL_test   import run_cycles, run_cycle_check
+from rsa_xcel_mont.test.MontModExp_test import test_case_table
+
+from rsa_xcel_mont.MontModExp   import MontModExp
+from rsa_xcel_mont.MontModExpCL import MontModExpCL
+
+#-------------------------------------------------------------------------
+# Test cases
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( **test_case_table )
+def test( test_params, cmdline_opts ):
+  run_cycles( MontModExpCL(), test_params, cmdline_opts, [] )
+
+@pytest.mark.parametrize( **test_case_table )
+def test_cycles( test_params, cmdline_opts ):
+  run_cycle_check( MontModExp(), MontModExpCL(), test_params, cmdline_opts )
+
+@pytest.mark.parametrize( **test_case_table )
+def test_queues( test_params, cmdline_opts ):
+  run_cycles( MontModExpCL( queue_depth=2 ), test_params, cmdline_opts, [] )
@@ -10,7 +10,10 @@ from pymtl3 import *
 from pymtl3.stdlib.test_utils import mk_test_case_table, run_sim
 from pymtl3.stdlib.stream import StreamSourceFL, StreamSinkFL
 
-from rsa_xcel_mont.MontModExp import MontModExp
+from div.ModDivCL import mod_div_cycles
+from rsa_xcel_mont.MontModExp   import MontModExp
+from rsa_xcel_mont.MontModExpCL import MontModExpCL
+from rsa_xcel_mont.test.MontConvertIn_test import r2_cache_hits
 
 #-------------------------------------------------------------------------
 # mod_exp
@@ -54,6 +57,21 @@ class TestHarness( Component ):
     s.src.ostream    //= s.modexp.istream
     s.modexp.ostream //= s.sink.istream
 
+    # Cycles at which each message is accepted and each result is taken,
+    # for checking latencies
+
+    s.cycle      = 0
+    s.in_cycles  = []
+    s.out_cycles = []
+
+    @update_ff
+    def up_timestamps():
+      if s.modexp.istream.val & s.modexp.istream.rdy:
+        s.in_cycles.append( s.cycle )
+      if s.modexp.ostream.val & s.modexp.ostream.rdy:
+        s.out_cycles.append( s.cycle )
+      s.cycle += 1
+
   def done( s ):
     return s.src.done() and s.sink.done()
 
@@ -130,6 +148,41 @@ for i in range(10):
   random_large_msgs.extend( [ mk_imsg( b, e, n ), mk_omsg( mod_exp( b, e, n ) ) ] )
 
 
+# Runs of messages under one modulus, which reuse the cached R^2 mod n,
+# switching moduli (and back) between runs
+
+same_mod_msgs = []
+for n in [ 0xcb35aebb, 0xcb35aebb, 0xe6eb1037, 0xcb35aebb ]:
+  for i in range(5):
+    b = randint(0,4294967295)
+    e = randint(0,4294967295)
+
+    same_mod_msgs.extend( [ mk_imsg( b, e, n ), mk_omsg( mod_exp( b, e, n ) ) ] )
+
+# Back-to-back messages, each offered while the one before it is still
+# in the divider: a repeat of the modulus being divided must hit on the
+# entry that division fills, and one matching the entry it replaces must
+# miss
+
+hit_during_miss_msgs = []
+for n in [ 0xcb35aebb, 0xe6eb1037, 0xe6eb1037, 0xcb35aebb, 0xcb35aebb, 0xe6eb1037 ]:
+  b = randint(0,4294967295)
+  e = randint(0,4294967295)
+
+  hit_during_miss_msgs.extend( [ mk_imsg( b, e, n ), mk_omsg( mod_exp( b, e, n ) ) ] )
+
+# Short runs alternating between two moduli, each switching back to a
+# modulus after the other has replaced it in the cache
+
+switch_back_msgs = []
+for n in [ 0xcb35aebb, 0xe6eb1037 ] * 3:
+  for i in range(2):
+    b = randint(0,4294967295)
+    e = randint(0,4294967295)
+
+    switch_back_msgs.extend( [ mk_imsg( b, e, n ), mk_omsg( mod_exp( b, e, n ) ) ] )
+
+
 #-------------------------------------------------------------------------
 # Test Case Table
 #-------------------------------------------------------------------------
@@ -164,17 +217,48 @@ test_case_table = mk_test_case_table([
   [         "random_large",       random_large_msgs,             60,            40 ],
   [         "random_large",       random_large_msgs,             40,            60 ],
 
+  [        "same_mod_msgs",           same_mod_msgs,              0,             0 ],
+  [        "same_mod_msgs",           same_mod_msgs,             40,             0 ],
+  [        "same_mod_msgs",           same_mod_msgs,              0,            40 ],
+  [        "same_mod_msgs",           same_mod_msgs,             40,            40 ],
+  [        "same_mod_msgs",           same_mod_msgs,             60,            40 ],
+  [        "same_mod_msgs",           same_mod_msgs,             40,            60 ],
+
+  [   "hit_during_miss_msgs",    hit_during_miss_msgs,              0,             0 ],
+  [   "hit_during_miss_msgs",    hit_during_miss_msgs,             40,             0 ],
+  [   "hit_during_miss_msgs",    hit_during_miss_msgs,              0,            40 ],
+  [   "hit_during_miss_msgs",    hit_during_miss_msgs,             40,            40 ],
+  [   "hit_during_miss_msgs",    hit_during_miss_msgs,             60,            40 ],
+  [   "hit_during_miss_msgs",    hit_during_miss_msgs,             40,            60 ],
+
+  [       "switch_back_msgs",        switch_back_msgs,              0,             0 ],
+  [       "switch_back_msgs",        switch_back_msgs,             40,             0 ],
+  [       "switch_back_msgs",        switch_back_msgs,              0,            40 ],
+  [       "switch_back_msgs",        switch_back_msgs,             40,            40 ],
+  [       "switch_back_msgs",        switch_back_msgs,             60,            40 ],
+  [       "switch_back_msgs",        switch_back_msgs,             40,            60 ],
+
 ])
 
+# Messages spaced out so that each goes through on its own, for checking
+# the latency saved by each hit in MontConvertIn's R^2 mod n cache
+
+r2_cache_case_table = mk_test_case_table([
+  (                                         "msgs       src_delay     sink_delay"),
+  [        "same_mod_msgs",           same_mod_msgs,            300,             0 ],
+  [   "hit_during_miss_msgs",    hit_during_miss_msgs,            300,             0 ],
+  [       "switch_back_msgs",        switch_back_msgs,            300,             0 ],
+])
 
 #-------------------------------------------------------------------------
-# TestHarness
+# run_latencies
 #-------------------------------------------------------------------------
+# Runs a test case through a model, returning the latency of each
+# message from being accepted to its result being taken
 
-@pytest.mark.parametrize( **test_case_table )
-def test( test_params, cmdline_opts ):
+def run_latencies( modexp, test_params, cmdline_opts, duts ):
 
-  th = TestHarness( MontModExp() )
+  th = TestHarness( modexp )
 
   th.set_param("top.src.construct",
     msgs=test_params.msgs[::2],
@@ -190,5 +274,33 @@ def test( test_params, cmdline_opts ):
 
   cmdline_opts["max_cycles"] = 100000
 
-  run_sim( th, cmdline_opts, duts=['modexp'] )
+  run_sim( th, cmdline_opts, duts=duts )
+
+  return [ out - in_ for in_, out in zip( th.in_cycles, th.out_cycles ) ]
+
+#-------------------------------------------------------------------------
+# Test cases
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( **test_case_table )
+def test( test_params, cmdline_opts ):
+  run_latencies( MontModExp(), test_params, cmdline_opts, ['modexp'] )
+
+# Each hit must skip the division: on its own, it finishes sooner than
+# the CL model without the cache by the cycles the division would take
+# (less the one cycle a hit spends in its place), and misses match it
+
+@pytest.mark.parametrize( **r2_cache_case_table )
+def test_r2_cache( test_params, cmdline_opts ):
+
+  rtl     = run_latencies( MontModExp(), test_params, dict( cmdline_opts ), ['modexp'] )
+  nocache = run_latencies( MontModExpCL( r2_cache=False ), test_params,
+                           dict( cmdline_opts ), [] )
+
+  for i, hit in enumerate( r2_cache_hits( test_params.msgs ) ):
+
+    n       = int( test_params.msgs[2*i][64:96] )
+    skipped = mod_div_cycles( 1 << 64, n, 65 ) - 1 if hit else 0
+
+    assert rtl[i] == nocache[i] - skipped
 
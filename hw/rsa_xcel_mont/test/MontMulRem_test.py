@@ -11,7 +11,7 @@ from pymtl3.stdlib.test_utils import mk_test_case_table, run_sim
 from pymtl3.stdlib.stream import StreamSourceFL, StreamSinkFL
 
 from rsa_xcel_mont.MontMulRem import MontMulRem
-from rsa_xcel_mont.test.MontMultiplier import MontMultiplier
+from rsa_xcel_mont.MontMultiplier import MontMultiplier
 
 #-------------------------------------------------------------------------
 # TestHarness
@@ -0,0 +1,105 @@
+#=========================================================================
+# MontMultiplierBatch_test
+#=========================================================================
+# Checks the batched Montgomery model against MontMultiplier and Python's
+# built-in pow, lane by lane
+
+import pytest
+
+from random import randint, seed
+
+np = pytest.importorskip( "numpy" )
+
+from rsa_xcel_mont.MontMultiplier           import MontMultiplier
+from rsa_xcel_mont.test.MontMultiplierBatch import MontMultiplierBatch, mod_exp
+
+seed( 0xdeadbeef )
+
+#-------------------------------------------------------------------------
+# Test vectors
+#-------------------------------------------------------------------------
+
+edge_mods = [ 3, 5, 0xfffffffb, 0xffffffff, 0x80000001 ]
+
+def random_mods( num ):
+  return edge_mods + [ randint( 1, 0x7fffffff ) * 2 + 1 for i in range( num ) ]
+
+#-------------------------------------------------------------------------
+# test_multiply
+#-------------------------------------------------------------------------
+
+def test_multiply():
+  mods = random_mods( 500 )
+  a    = [ randint( 0, mod - 1 ) for mod in mods ]
+  b    = [ randint( 0, mod - 1 ) for mod in mods ]
+
+  # Include operands at the extremes of each lane's range
+
+  a[0], b[0] = 0, 0
+  a[1], b[1] = mods[1] - 1, mods[1] - 1
+  a[3], b[3] = mods[3] - 1, mods[3] - 1
+
+  batch  = MontMultiplierBatch( mods )
+  result = batch.multiply( np.array( a, dtype=np.uint64 ),
+                           np.array( b, dtype=np.uint64 ) )
+
+  for i, mod in enumerate( mods ):
+    MontMult = MontMultiplier( mod, ( 1 << 32 ) )
+    assert int( result[i] ) == MontMult.multiply( a[i], b[i] )
+
+#-------------------------------------------------------------------------
+# test_convert
+#-------------------------------------------------------------------------
+
+def test_convert():
+  mods = random_mods( 500 )
+  x    = np.array( [ randint( 0, mod - 1 ) for mod in mods ], dtype=np.uint64 )
+
+  batch = MontMultiplierBatch( mods )
+
+  for i, mod in enumerate( mods ):
+    MontMult = MontMultiplier( mod, ( 1 << 32 ) )
+    assert int( batch.convert_in( x )[i] ) == MontMult.convert_in( int( x[i] ) )
+
+  assert np.array_equal( batch.convert_out( batch.convert_in( x ) ), x )
+
+#-------------------------------------------------------------------------
+# test_mod_exp
+#-------------------------------------------------------------------------
+
+def test_mod_exp():
+  mods      = random_mods( 500 )
+  bases     = [ randint( 0, mod - 1 ) for mod in mods ]
+  exponents = [ randint( 0, ( 1 << randint( 0, 32 ) ) - 1 ) for mod in mods ]
+
+  # Zero bases/exponents, and lanes with much shorter exponents than
+  # their neighbours
+
+  bases[0], exponents[0] = 0, 0
+  bases[1], exponents[1] = 0, 5
+  bases[2], exponents[2] = 7, 0
+  exponents[3] = 0xffffffff
+  exponents[4] = 1
+
+  result = mod_exp( bases, exponents, mods )
+
+  for i, mod in enumerate( mods ):
+    assert int( result[i] ) == pow( bases[i], exponents[i], mod )
+
+#-------------------------------------------------------------------------
+# test_mod_exp_chunked
+#-------------------------------------------------------------------------
+# Batches larger than one chunk are split up, including a final partial
+# chunk
+
+def test_mod_exp_chunked():
+  mods      = random_mods( 95 )
+  bases     = [ randint( 0, mod - 1 ) for mod in mods ]
+  exponents = [ randint( 0, 0xffffffff ) for mod in mods ]
+
+  result = mod_exp( bases, exponents, mods, chunk_size=16 )
+
+  assert len( result ) == len( mods )
+
+  for i, mod in enumerate( mods ):
+    assert int( result[i] ) == pow( bases[i], exponents[i], mod )
@@ -0,0 +1,37 @@
+#=========================================================================
+# RSAMontXcelFL_test
+#=========================================================================
+
+import pytest
+
+from pymtl3.stdlib.test_utils import mk_test_case_table
+
+from rsa_xcel_naive.test.RSAXcelFL_test import test_case_table, run_test
+from rsa_xcel_naive.test.RSAXcelFL_test import gen_xcel_protocol_msgs
+from rsa_xcel_mont.RSAMontXcelFL import RSAMontXcelFL
+
+@pytest.mark.parametrize( **test_case_table )
+def test( cmdline_opts, test_params, xcel_stats_file ):
+  run_test( RSAMontXcelFL(), cmdline_opts, test_params, xcel_stats_file )
+
+#-------------------------------------------------------------------------
+# Zero results
+#-------------------------------------------------------------------------
+# Moduli with a repeated prime factor and bases that are multiples of
+# it, where the result is 0 but MontMultiplier's final subtraction would
+# leave it as n. The RTL returns n for these, so they are FL-only.
+
+zero_data  = []
+zero_data += gen_xcel_protocol_msgs( 65, 135, 169 )
+zero_data += gen_xcel_protocol_msgs( 26,   2, 169 )
+zero_data += gen_xcel_protocol_msgs(  6,   2,   9 )
+zero_data += gen_xcel_protocol_msgs( 15,   2,  45 )
+
+zero_case_table = mk_test_case_table([
+  (               "data       src sink stall lat"),
+  [ "zero_data",   zero_data,  0,  0,   0,    0   ],
+])
+
+@pytest.mark.parametrize( **zero_case_table )
+def test_zero( cmdline_opts, test_params ):
+  run_test( RSAMontXcelFL(), cmdline_opts, test_params )
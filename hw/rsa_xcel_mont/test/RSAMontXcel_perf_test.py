@@ -0,0 +1,19 @@
+#=========================================================================
+# RSAMontXcel_perf_test
+#=========================================================================
+# Cycle count regressions for the Montgomery accelerator, using the same
+# workloads as RSAXcel_perf_test with baselines of its own.
+
+import os
+import pytest
+
+from rsa_xcel_naive.test.RSAXcel_perf_test import perf_case_table, run_perf_check
+from rsa_xcel_mont.RSAMontXcel import RSAMontXcel
+
+baseline_file = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ),
+                              "RSAMontXcel_perf_baselines.json" )
+
+@pytest.mark.parametrize( **perf_case_table )
+def test( cmdline_opts, perf_opts, test_params, request ):
+  run_perf_check( RSAMontXcel(), cmdline_opts, perf_opts, baseline_file,
+                  request.node.callspec.id, test_params.data )
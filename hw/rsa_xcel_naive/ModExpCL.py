@@ -0,0 +1,114 @@
+#=========================================================================
+# ModExp CL Model
+#=========================================================================
+# Cycle-approximate model of ModExp, for exploring latencies without
+# rebuilding the Verilog
+#
+# Each message is computed functionally as soon as it is accepted, along
+# with the number of cycles the RTL would take to produce it; the result
+# is then held back until that many cycles have passed. The cycle counts
+# follow the RTL's FSMs:
+#
+#  - ModExp spends one cycle in IDLE, then for each exponent bit (at
+#    least one) sends to its MulRems and waits for both of them, taking
+#    one extra cycle per iteration to move back to SEND
+#  - MulRem is a single-cycle multiplier followed by ModDiv, whose
+#    latency depends on how far the divisor must be shifted, and on when
+#    its early exits trigger (see mod_div_cycles)
+#
+# The defaults reproduce the RTL; the constructor parameters change the
+# latency of each piece:
+#
+#  mul_latency : cycles for the multiplier in each MulRem
+#  div_latency : cycles for each ModDiv, or None to model the RTL's
+#                data-dependent latency
+#  ctrl_cycles : control overhead at the start and in each iteration
+
+from pymtl3 import *
+from pymtl3.stdlib.stream.ifcs import IStreamIfc, OStreamIfc
+
+from cl.StagePipeline import StagePipeline
+from div.ModDivCL     import mod_div_cycles
+
+#-------------------------------------------------------------------------
+# ModExpCL
+#-------------------------------------------------------------------------
+
+class ModExpCL( Component ):
+
+  # Constructor
+
+  def construct( s, mul_latency=1, div_latency=None, ctrl_cycles=1 ):
+
+    # Interface
+
+    s.istream = IStreamIfc( mk_bits( 96 ) )
+    s.ostream = OStreamIfc( Bits32 )
+
+    # Latency knobs
+
+    s.mul_latency = mul_latency
+    s.div_latency = div_latency
+    s.ctrl_cycles = ctrl_cycles
+
+    s.pipe = StagePipeline( [ ( s.mod_exp, 1 ) ] )
+
+    # CL block
+
+    @update_ff
+    def up_modexp_cl():
+
+      if s.reset:
+        s.pipe.reset()
+      else:
+        in_msg = None
+        if s.istream.val & s.istream.rdy:
+          in_msg = ( int( s.istream.msg[ 0:32] ), int( s.istream.msg[32:64] ),
+                     int( s.istream.msg[64:96] ) )
+        s.pipe.tick( in_msg, s.ostream.val & s.ostream.rdy )
+
+      result = s.pipe.output()
+
+      s.istream.rdy <<= 1 if s.pipe.can_accept() else 0
+      s.ostream.val <<= 0 if result is None else 1
+      s.ostream.msg <<= 0 if result is None else result
+
+  # Latency of one MulRem
+
+  def mul_rem_cycles( s, a, b, n ):
+    if s.div_latency is None:
+      return s.mul_latency + mod_div_cycles( a * b, n, 64 )
+    return s.mul_latency + s.div_latency
+
+  # Computes b^e mod n as the datapath does, returning the result and the
+  # cycles from accepting the message to the result being valid
+
+  def mod_exp( s, msg ):
+
+    b, e, n = msg
+
+    r      = 1
+    cycles = s.ctrl_cycles
+
+    while True:
+
+      latency = s.mul_rem_cycles( b, b, n )
+
+      if e & 1:
+        latency = max( latency, s.mul_rem_cycles( r, b, n ) )
+        r = ( r * b ) % n
+
+      b = ( b * b ) % n
+      e = e >> 1
+
+      cycles += latency + s.ctrl_cycles
+
+      if e == 0:
+        break
+
+    return r, cycles
+
+  # Line tracing
+
+  def line_trace( s ):
+    return f"{s.istream}({s.pipe.line_trace()}){s.ostream}"
@@ -19,6 +19,10 @@
 //  5. Wait for accelerator to finish by reading xr0, result will be the
 //     result of modular exponentiation
 //
+// The registers keep their values between operations, so a stream of
+// bases under one key (sticky-key mode) only needs the exponent and
+// modulus written once. Each base after that is just steps 1, 4 and 5.
+//
 
 `ifndef RSA_XCEL_NAIVE_XCELADAPTER_V
 `define RSA_XCEL_NAIVE_XCELADAPTER_V
@@ -148,7 +152,7 @@ module rsa_xcel_naive_XcelAdapter
     // Data
     //---------------------------------------------------------
 
-    // Input data registers
+    // Input data registers, which hold their values across operations
 
     logic [31:0] base_reg;
     logic [31:0] exp_reg;
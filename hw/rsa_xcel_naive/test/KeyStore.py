@@ -0,0 +1,87 @@
+#=========================================================================
+# KeyStore
+#=========================================================================
+# On-disk cache of RSA key pairs for the accelerator tests
+#
+# Generating keys at import time makes every pytest collection pay for
+# it, so the tests instead load keys through algo/keystore.py's KeyStore,
+# generating and saving any that are missing. Keys are identified by
+# ( bits, seed, index ): key i of a seed is always generated from the
+# same random state, so the cache can be deleted at any time without
+# changing the tests.
+#
+# The file format and cache handling are algo/keystore.py's, but the
+# keys are not: these are generated with python-rsa's primality test, as
+# the hardware tests don't depend on our algorithmic implementations
+
+import importlib.util
+import os
+import random
+
+from math       import gcd
+from rsa.prime  import is_prime
+from rsa.common import inverse
+
+hw_dir = os.path.dirname( os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+
+# Loaded by path rather than by putting algo/ on sys.path, where its
+# test.py would shadow the standard library's test package
+
+spec     = importlib.util.spec_from_file_location( "algo_keystore",
+             os.path.join( hw_dir, "..", "algo", "keystore.py" ) )
+keystore = importlib.util.module_from_spec( spec )
+spec.loader.exec_module( keystore )
+
+KEY_FIELDS  = keystore.KEY_FIELDS
+DEFAULT_DIR = os.path.join( hw_dir, ".keycache" )
+
+#-------------------------------------------------------------------------
+# gen_key
+#-------------------------------------------------------------------------
+# Generates key index of a seed, as a tuple in KEY_FIELDS order. Only a
+# private random generator is used, so the tests' own random state is
+# left alone
+
+def gen_key( bits, seed, index ):
+
+  assert bits >= 18, "Keys must be larger than e = 65537"
+
+  rng = random.Random( "{}:{}:{}".format( bits, seed, index ) )
+
+  def random_prime( prime_bits ):
+    while True:
+      candidate = rng.getrandbits( prime_bits ) | ( 3 << ( prime_bits - 2 ) ) | 1
+      if is_prime( candidate ):
+        return candidate
+
+  # Setting the top two bits of each prime makes n exactly bits long
+
+  while True:
+    p = random_prime( bits - ( bits // 2 ) )
+    q = random_prime( bits // 2 )
+
+    totient = ( p - 1 ) * ( q - 1 )
+    if p != q and gcd( 65537, totient ) == 1:
+      break
+
+  n = p * q
+  e = 65537
+  d = inverse( e, totient )
+
+  return ( n, e, d, p, q, d % ( p - 1 ), d % ( q - 1 ), inverse( q, p ) )
+
+def gen_keys( bits, seed, indices ):
+  return [ gen_key( bits, seed, index ) for index in indices ]
+
+#-------------------------------------------------------------------------
+# KeyStore
+#-------------------------------------------------------------------------
+# The cached keys for one ( bits, seed ) pair, generated by gen_key
+
+class KeyStore( keystore.KeyStore ):
+
+  def __init__( self, bits=32, seed=0, path=DEFAULT_DIR ):
+    super().__init__( bits, seed, path )
+
+  def ensure( self, count, generate=gen_keys ):
+    super().ensure( count, generate )
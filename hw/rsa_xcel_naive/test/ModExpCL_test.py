@@ -0,0 +1,69 @@
+#=========================================================================
+# ModExpCL_test
+#=========================================================================
+# Checks that the CL model computes the same results as ModExp, and that
+# its cycle counts stay within a few percent of the RTL's on the same
+# test vectors, source and sink delays.
+
+import pytest
+
+from pymtl3.stdlib.test_utils import run_sim
+
+from rsa_xcel_naive.test.ModExp_test import TestHarness, test_case_table
+
+from rsa_xcel_naive.ModExp   import ModExp
+from rsa_xcel_naive.ModExpCL import ModExpCL
+
+#-------------------------------------------------------------------------
+# run_cycles
+#-------------------------------------------------------------------------
+# Runs a test case through the model, returning the total cycle count
+
+def run_cycles( modexp, test_params, cmdline_opts, duts ):
+
+  th = TestHarness( modexp )
+
+  th.set_param("top.src.construct",
+    msgs=test_params.msgs[::2],
+    initial_delay=test_params.src_delay+3,
+    interval_delay=test_params.src_delay )
+
+  th.set_param("top.sink.construct",
+    msgs=test_params.msgs[1::2],
+    initial_delay=test_params.sink_delay+3,
+    interval_delay=test_params.sink_delay )
+
+  cmdline_opts["max_cycles"] = 100000
+
+  run_sim( th, cmdline_opts, duts=duts )
+
+  return th.sim_cycle_count()
+
+#-------------------------------------------------------------------------
+# run_cycle_check
+#-------------------------------------------------------------------------
+# Compares the cycle counts of the RTL and CL models on a test case
+
+cycle_tolerance = 0.02
+
+def run_cycle_check( rtl, cl, test_params, cmdline_opts ):
+
+  rtl_cycles = run_cycles( rtl, test_params, dict( cmdline_opts ), ['modexp'] )
+  cl_cycles  = run_cycles( cl,  test_params, dict( cmdline_opts ), [] )
+
+  print( "  RTL cycles = ", rtl_cycles )
+  print( "   CL cycles = ", cl_cycles )
+
+  assert abs( cl_cycles - rtl_cycles ) <= cycle_tolerance * rtl_cycles
+
+#-------------------------------------------------------------------------
+# Test cases
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize( **test_case_table )
+def test( test_params, cmdline_opts ):
+  run_cycles( ModExpCL(), test_params, cmdline_opts, [] )
+
+@pytest.mark.parametrize( **test_case_table )
+def test_cycles( test_params, cmdline_opts ):
+  run_cycle_check( ModExp(), ModExpCL(), test_params, cmdline_opts )
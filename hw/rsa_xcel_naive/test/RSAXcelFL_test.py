@@ -14,12 +14,13 @@ from pymtl3.stdlib.stream     import StreamSourceFL, StreamSinkFL
 from pymtl3.stdlib.xcel       import XcelMsgType, mk_xcel_msg
 
 from rsa.core import encrypt_int
-from rsa      import newkeys
 
 from random import randint, seed
 seed( 0xdeadbeef )
 
-from rsa_xcel_naive.RSAXcelFL import RSAXcelFL
+from rsa_xcel_naive.RSAXcelFL        import RSAXcelFL
+from rsa_xcel_naive.test.KeyStore    import KeyStore
+from rsa_xcel_naive.test.XcelMonitor import XcelMonitor
 
 XcelReqMsg, XcelRespMsg = mk_xcel_msg( 5, 32 )
 
@@ -38,6 +39,16 @@ class TestHarness( Component ):
     s.src.ostream  //= s.xcel.xcel.reqstream
     s.sink.istream //= s.xcel.xcel.respstream
 
+    # Timestamp every request and response for per-operation stats
+
+    s.monitor = XcelMonitor()
+
+    @update_ff
+    def up_monitor():
+      s.monitor.tick( s.xcel.xcel.reqstream.val,  s.xcel.xcel.reqstream.rdy,
+                      s.xcel.xcel.reqstream.msg,  s.xcel.xcel.respstream.val,
+                      s.xcel.xcel.respstream.rdy, s.xcel.xcel.respstream.msg )
+
   def done( s ):
     return s.src.done() and s.sink.done()
 
@@ -79,6 +90,25 @@ def gen_xcel_protocol_msgs( base, exp, mod ):
     xreq( 'rd', 0, 0         ), xresp( 'rd', encrypt_int( base, exp, mod ) ),
   ]
 
+#-------------------------------------------------------------------------
+# gen_xcel_sticky_msgs
+#-------------------------------------------------------------------------
+# Sticky-key protocol: the exponent and modulus are written once, then
+# each base only needs its own write, go and done
+
+def gen_xcel_sticky_msgs( bases, exp, mod ):
+  msgs = [
+    xreq( 'wr', 2, exp       ), xresp( 'wr',                             0 ),
+    xreq( 'wr', 3, mod       ), xresp( 'wr',                             0 ),
+  ]
+  for base in bases:
+    msgs += [
+      xreq( 'wr', 1, base    ), xresp( 'wr',                             0 ),
+      xreq( 'wr', 0, 0       ), xresp( 'wr',                             0 ),
+      xreq( 'rd', 0, 0       ), xresp( 'rd', encrypt_int( base, exp, mod ) ),
+    ]
+  return msgs
+
 #-------------------------------------------------------------------------
 # Test Cases
 #-------------------------------------------------------------------------
@@ -99,16 +129,23 @@ large_data += gen_xcel_protocol_msgs( 0x2c0f5fa7, 65537, 3074026273 )
 large_data += gen_xcel_protocol_msgs( 0x33128e5f, 65537, 2540810791 )
 large_data += gen_xcel_protocol_msgs( 0x017b30d3, 65537, 2639392183 )
 
-random_data = []
-for i in range( 10 ):
-  keys = newkeys( 32 )
-  pub_key = keys[0]
+# Keys come from the on-disk cache, only being generated on a miss
+
+key_store = KeyStore( bits=32, seed=0xdeadbeef )
 
-  n = pub_key.n
-  e = pub_key.e
+random_data = []
+for key in key_store.keys( 10 ):
+  n, e = key[0], key[1]
   message = randint( 0, n - 1 )
   random_data += gen_xcel_protocol_msgs( message, e, n )
 
+# Streams of bases under one key, switching keys (and back) between them
+
+sticky_data = []
+for key in key_store.keys( 3 ) + key_store.keys( 1 ):
+  n, e = key[0], key[1]
+  sticky_data += gen_xcel_sticky_msgs( [ randint( 0, n - 1 ) for i in range( 5 ) ], e, n )
+
 #-------------------------------------------------------------------------
 # Test Case Table
 #-------------------------------------------------------------------------
@@ -125,13 +162,15 @@ test_case_table = mk_test_case_table([
   [ "random_data_0x0x4",  random_data,    0,  0,   0.5,  4   ],
   [ "random_data_3x14x4", random_data,    3,  14,  0.5,  4   ],
   [ "random_data_5x7x4",  random_data,    5,  7,   0.5,  4   ],
+  [ "sticky_data",        sticky_data,    0,  0,   0,    0   ],
+  [ "sticky_data_3x14x4", sticky_data,    3,  14,  0.5,  4   ],
 ])
 
 #-------------------------------------------------------------------------
 # run_test
 #-------------------------------------------------------------------------
 
-def run_test( xcel, cmdline_opts, test_params ):
+def run_test( xcel, cmdline_opts, test_params, stats_file=None ):
 
   data = test_params.data
 
@@ -161,11 +200,18 @@ def run_test( xcel, cmdline_opts, test_params ):
 
   run_sim( th, cmdline_opts, duts=['xcel'] )
 
+  # Export per-operation cycle counts, if asked to
+
+  if stats_file is not None:
+    th.monitor.write_csv( stats_file )
+
+  return th.monitor
+
 #-------------------------------------------------------------------------
 # Test cases
 #-------------------------------------------------------------------------
 
 @pytest.mark.parametrize( **test_case_table )
-def test( cmdline_opts, test_params ):
-  run_test( RSAXcelFL(), cmdline_opts, test_params )
+def test( cmdline_opts, test_params, xcel_stats_file ):
+  run_test( RSAXcelFL(), cmdline_opts, test_params, xcel_stats_file )
 
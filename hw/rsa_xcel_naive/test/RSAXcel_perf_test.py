@@ -0,0 +1,168 @@
+#=========================================================================
+# RSAXcel_perf_test
+#=========================================================================
+# These are performance regressions to make sure the cycle counts of the
+# accelerator don't get worse over time.
+#
+# Each workload runs a batch of complete operations (configure, go, read
+# the result) through the same harness as RSAXcelFL_test, with no source
+# or sink delays, and compares its cycle count against a baseline stored
+# next to the test. A workload with no baseline fails; rerun with
+# --update-perf-baselines to record or accept new cycle counts.
+#
+# By default a workload may run up to 2% over its baseline, so that
+# small differences between simulator versions don't fail the check;
+# use --perf-tolerance to change this (0 requires an exact match or
+# better).
+
+import fcntl
+import json
+import os
+import pytest
+
+from random import Random
+
+from pymtl3.stdlib.test_utils import mk_test_case_table, run_sim
+from pymtl3.stdlib.xcel       import XcelMsgType
+
+from rsa_xcel_naive.test.RSAXcelFL_test import TestHarness, gen_xcel_protocol_msgs
+from rsa_xcel_naive.test.RSAXcelFL_test import gen_xcel_sticky_msgs
+from rsa_xcel_naive.test.KeyStore       import KeyStore
+
+from rsa_xcel_naive.RSAXcel import RSAXcel
+
+#-------------------------------------------------------------------------
+# Workloads
+#-------------------------------------------------------------------------
+# Encryption uses e = 65537, decryption the full-width private exponent
+# of the same keys. The worst case has every exponent bit set. The stream
+# encrypts a run of messages under one key with the sticky-key protocol.
+
+num_ops   = 4
+key_store = KeyStore( bits=32, seed=0x5745 )
+rng       = Random( 0x5745 )
+
+encrypt_data = []
+decrypt_data = []
+
+for n, e, d, p, q, dP, dQ, qInv in key_store.keys( num_ops ):
+  message = rng.randint( 0, n - 1 )
+  encrypt_data += gen_xcel_protocol_msgs( message, e, n )
+  decrypt_data += gen_xcel_protocol_msgs( pow( message, e, n ), d, n )
+
+n, e = key_store.keys( 1 )[0][:2]
+stream_data = gen_xcel_sticky_msgs(
+  [ rng.randint( 0, n - 1 ) for i in range( num_ops ) ], e, n )
+
+worst_data = []
+for i in range( num_ops ):
+  worst_data += gen_xcel_protocol_msgs( 0xfffffffa - i, 0xffffffff, 0xfffffffb )
+
+perf_case_table = mk_test_case_table([
+  (                "data"         ),
+  [ "encrypt",      encrypt_data  ],
+  [ "decrypt",      decrypt_data  ],
+  [ "worst_case",   worst_data    ],
+  [ "stream",       stream_data   ],
+])
+
+#-------------------------------------------------------------------------
+# Baselines
+#-------------------------------------------------------------------------
+# Baselines are kept as JSON alongside the tests and committed with
+# them, mapping each workload to its cycle count and number of
+# operations. Updates hold a lock while they re-read the
+# file and replace it atomically, so parallel test workers don't lose
+# each other's results. The lock file is kept in the directory the tests
+# run in (the build cache, see the build_dir fixture in conftest.py),
+# which all workers share, rather than next to the baselines.
+
+def load_baselines( filename ):
+  if not os.path.exists( filename ):
+    return {}
+  with open( filename ) as f:
+    return json.load( f )
+
+def save_baseline( filename, name, cycles, ops ):
+  lock_path = os.path.join( os.getcwd(), os.path.basename( filename ) + ".lock" )
+  with open( lock_path, "a" ) as lock:
+    fcntl.flock( lock, fcntl.LOCK_EX )
+
+    baselines = load_baselines( filename )
+    baselines[ name ] = { "cycles": cycles, "ops": ops }
+
+    temp = "{}.{}.tmp".format( filename, os.getpid() )
+    with open( temp, "w" ) as f:
+      json.dump( baselines, f, indent=2, sort_keys=True )
+      f.write( "\n" )
+    os.replace( temp, filename )
+
+#-------------------------------------------------------------------------
+# run_perf_check
+#-------------------------------------------------------------------------
+# Runs a workload through the accelerator and checks its cycle count
+# against the baseline named by the workload in baseline_file.
+#
+# Cycles are counted by the harness's monitor, from the first request
+# being accepted to the last response, so the source and sink models'
+# start-up and drain don't count. Every operation ends with one read of
+# xr0, which is how operations are counted. The cycles per operation
+# include the protocol overhead (ten messages per operation, or six with
+# the sticky-key protocol) as well as the modular exponentiation itself.
+
+def run_perf_check( xcel, cmdline_opts, perf_opts, baseline_file, name, data ):
+
+  th = TestHarness( xcel )
+
+  th.set_param( "top.src.construct",  msgs=data[::2]  )
+  th.set_param( "top.sink.construct", msgs=data[1::2] )
+
+  th.elaborate()
+
+  if cmdline_opts['max_cycles'] is None:
+    cmdline_opts['max_cycles'] = 100000
+
+  run_sim( th, cmdline_opts, duts=['xcel'] )
+
+  stats  = th.monitor.summary()
+  cycles = stats['cycles']
+  ops    = sum( 1 for req in data[::2] if req.type_ == XcelMsgType.READ )
+
+  print( "            workload = ", name )
+  print( "    total sim cycles = ", th.sim_cycle_count() )
+  print( "              cycles = ", cycles )
+  print( "      cycles per op  = ", cycles / ops )
+  print( "   mean latency (go) = ", stats['mean_latency'] )
+  print( "  throughput (op/cy) = ", stats['throughput'] )
+
+  if perf_opts['update']:
+    save_baseline( baseline_file, name, cycles, ops )
+    print( "  recorded baseline in", baseline_file )
+    return
+
+  baseline = load_baselines( baseline_file ).get( name )
+
+  if baseline is None:
+    pytest.fail( "No baseline for {} in {}; run with --update-perf-baselines "
+                 "to record one".format( name, baseline_file ) )
+
+  limit = baseline['cycles'] * ( 1 + perf_opts['tolerance'] )
+
+  print( "     baseline cycles = ", baseline['cycles'] )
+  print( "         max allowed = ", limit )
+
+  assert ops == baseline['ops'], \
+    "Workload changed size; rerun with --update-perf-baselines"
+  assert cycles <= limit
+
+#-------------------------------------------------------------------------
+# Test cases
+#-------------------------------------------------------------------------
+
+baseline_file = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ),
+                              "RSAXcel_perf_baselines.json" )
+
+@pytest.mark.parametrize( **perf_case_table )
+def test( cmdline_opts, perf_opts, test_params, request ):
+  run_perf_check( RSAXcel(), cmdline_opts, perf_opts, baseline_file,
+                  request.node.callspec.id, test_params.data )
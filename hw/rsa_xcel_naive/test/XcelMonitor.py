@@ -0,0 +1,122 @@
+#=========================================================================
+# XcelMonitor
+#=========================================================================
+# Timestamps the accelerator's request and response streams by
+# simulation cycle, so that tests can measure each operation.
+#
+# The test harness calls tick() once per cycle with the state of both
+# streams. An operation starts with its first request (the write of xr1)
+# and ends with the response to the read of xr0; its latency is measured
+# from the go request (the write of xr0) to that response. Stall cycles
+# are cycles where a message was valid but not accepted, either because
+# the accelerator wasn't ready for a request or because the sink wasn't
+# ready for a response.
+
+import csv
+
+from pymtl3.stdlib.xcel import XcelMsgType
+
+class XcelMonitor:
+
+  # Columns of the CSV export, in order
+
+  fields = [ "op", "start", "go", "done", "latency", "cycles",
+             "req_stalls", "resp_stalls" ]
+
+  def __init__( self ):
+    '''
+    Starts counting from cycle 0, with no operations recorded
+    '''
+
+    self.cycle = 0
+    self.ops   = []
+
+    self.reset_op()
+
+    self.total_req_stalls  = 0
+    self.total_resp_stalls = 0
+
+  def reset_op( self ):
+    '''
+    Clears the state of the operation in progress
+    '''
+
+    self.start       = None
+    self.go          = None
+    self.req_stalls  = 0
+    self.resp_stalls = 0
+
+  def tick( self, req_val, req_rdy, req_msg, resp_val, resp_rdy, resp_msg ):
+    '''
+    Records one cycle of both streams
+    '''
+
+    if req_val and not req_rdy:
+      self.req_stalls       += 1
+      self.total_req_stalls += 1
+
+    if resp_val and not resp_rdy:
+      self.resp_stalls       += 1
+      self.total_resp_stalls += 1
+
+    if req_val and req_rdy:
+      if self.start is None:
+        self.start = self.cycle
+      if req_msg.type_ == XcelMsgType.WRITE and req_msg.addr == 0:
+        self.go = self.cycle
+
+    if resp_val and resp_rdy and resp_msg.type_ == XcelMsgType.READ:
+      self.ops.append( {
+        "op"          : len( self.ops ),
+        "start"       : self.start,
+        "go"          : self.go,
+        "done"        : self.cycle,
+        "latency"     : self.cycle - self.go,
+        "cycles"      : self.cycle - self.start,
+        "req_stalls"  : self.req_stalls,
+        "resp_stalls" : self.resp_stalls,
+      } )
+      self.reset_op()
+
+    self.cycle += 1
+
+  def latencies( self ):
+    '''
+    Latency (go to done) of each completed operation, in cycles
+    '''
+
+    return [ op["latency"] for op in self.ops ]
+
+  def summary( self ):
+    '''
+    Returns the number of operations, their mean/min/max latency, the
+    throughput (operations per cycle, from the first request to the
+    last response) and the total stall cycles, as a dict
+    '''
+
+    if not self.ops:
+      return { "ops": 0 }
+
+    latencies = self.latencies()
+    span      = self.ops[-1]["done"] - self.ops[0]["start"] + 1
+
+    return {
+      "ops"          : len( self.ops ),
+      "mean_latency" : sum( latencies ) / len( latencies ),
+      "min_latency"  : min( latencies ),
+      "max_latency"  : max( latencies ),
+      "cycles"       : span,
+      "throughput"   : len( self.ops ) / span,
+      "req_stalls"   : self.total_req_stalls,
+      "resp_stalls"  : self.total_resp_stalls,
+    }
+
+  def write_csv( self, filename ):
+    '''
+    Writes one row per operation to filename
+    '''
+
+    with open( filename, "w", newline="" ) as f:
+      writer = csv.DictWriter( f, fieldnames=self.fields )
+      writer.writeheader()
+      writer.writerows( self.ops )